@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for the skill pipeline, the watcher and the converter.
+
+Synthetic markdown corpora (flat, deeply nested, bullet-heavy, one huge file
+and a tree of many small files) are generated in a temporary directory. Each
+benchmark reports its best wall time over ``--repeat`` runs, throughput and
+peak traced memory. Results are compared with a stored baseline and any
+benchmark slower than ``--threshold`` is flagged as a regression.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import convert_bs_to_md, watch_md  # type: ignore  # noqa: E402
+from skill.core.executor import execute  # noqa: E402
+from skill.core.planner import plan  # noqa: E402
+from skill.core.prompt import build_prompt  # noqa: E402
+from skill.core.source import load_source  # noqa: E402
+from skill.core.types import Message, SkillPlan, SkillRequest  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / ".bench" / "baseline.json"
+
+# tree_files: size of the many-files trees; huge_kb: size of the single huge file.
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny": {"tree_files": 20, "huge_kb": 64, "sections": 20},
+    "small": {"tree_files": 1_000, "huge_kb": 2_048, "sections": 200},
+    "medium": {"tree_files": 10_000, "huge_kb": 10_240, "sections": 1_000},
+    "large": {"tree_files": 100_000, "huge_kb": 51_200, "sections": 5_000},
+}
+
+_WORDS = (
+    "platform service identity billing search ingestion pipeline storage "
+    "gateway workflow policy telemetry onboarding payments ledger catalog"
+).split()
+
+
+def _sentence(seed: int, length: int = 12) -> str:
+    return " ".join(_WORDS[(seed * 7 + i * 3) % len(_WORDS)] for i in range(length)).capitalize() + "."
+
+
+def flat_doc(sections: int) -> str:
+    parts = ["# Flat Corpus", _sentence(0, 30), ""]
+    for idx in range(sections):
+        parts += [f"## Area {idx}", _sentence(idx), _sentence(idx + 1), ""]
+    return "\n".join(parts)
+
+
+def nested_doc(sections: int, depth: int = 6) -> str:
+    parts = ["# Nested Corpus", _sentence(0, 30), ""]
+    for idx in range(sections):
+        level = 2 + idx % (depth - 1)
+        parts += ["#" * level + f" Node {idx}", _sentence(idx), ""]
+    return "\n".join(parts)
+
+
+def bullet_doc(sections: int, bullets: int = 20) -> str:
+    parts = ["# Bullet Corpus", _sentence(0, 30), ""]
+    for idx in range(sections):
+        parts.append(f"## Group {idx}")
+        parts += [f"- {_sentence(idx + b, 4)}" for b in range(bullets)]
+        parts.append("")
+    return "\n".join(parts)
+
+
+def huge_doc(size_kb: int) -> str:
+    parts = ["# Huge Corpus", _sentence(0, 30), ""]
+    size = 0
+    idx = 0
+    while size < size_kb * 1024:
+        block = f"## Chapter {idx}\n" + "\n".join(_sentence(idx + n, 20) for n in range(40)) + "\n"
+        parts.append(block)
+        size += len(block)
+        idx += 1
+    return "\n".join(parts)
+
+
+def write_tree(root: Path, files: int, suffix: str, content: Callable[[int], str]) -> None:
+    """Write ``files`` documents spread over nested directories of 100 files each."""
+
+    for idx in range(files):
+        directory = root / f"d{idx // 10_000}" / f"d{idx // 100}"
+        if idx % 100 == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"doc{idx}{suffix}").write_text(content(idx), encoding="utf-8")
+
+
+def _skill_plan(
+    text: str, file_path: Optional[str] = None, series: bool = False, wardley: bool = False
+) -> SkillPlan:
+    return SkillPlan(
+        user_text=text,
+        file_path=file_path,
+        want_series=series,
+        want_wardley=wardley,
+        deterministic=True,
+    )
+
+
+class Corpus:
+    """Generate the benchmark inputs under ``workdir`` on first use.
+
+    Only the corpora that the selected benchmarks touch are built, so
+    ``--only`` on a large scale does not write trees nobody reads.
+    """
+
+    _DOCS = ("flat", "nested", "bullets", "huge")
+
+    def __init__(self, workdir: Path, scale: Dict[str, int]) -> None:
+        self.workdir = workdir
+        self.scale = scale
+        self._docs: Dict[str, str] = {}
+        self._paths: Dict[str, str] = {}
+        self._trees: Dict[str, Path] = {}
+
+    def doc(self, name: str) -> str:
+        if name not in self._docs:
+            sections = self.scale["sections"]
+            self._docs[name] = {
+                "flat": lambda: flat_doc(sections),
+                "nested": lambda: nested_doc(sections),
+                "bullets": lambda: bullet_doc(sections),
+                "huge": lambda: huge_doc(self.scale["huge_kb"]),
+            }[name]()
+        return self._docs[name]
+
+    def doc_mib(self, name: str) -> float:
+        return len(self.doc(name).encode("utf-8")) / (1024 * 1024)
+
+    def path(self, name: str) -> str:
+        if name not in self._paths:
+            path = self.workdir / f"{name}.md"
+            path.write_text(self.doc(name), encoding="utf-8")
+            self._paths[name] = str(path)
+        return self._paths[name]
+
+    def md_tree(self) -> Path:
+        if "md" not in self._trees:
+            root = self.workdir / "md-tree"
+            write_tree(root, self.scale["tree_files"], ".md", lambda idx: flat_doc(3 + idx % 5))
+            self._trees["md"] = root
+        return self._trees["md"]
+
+    def bs_tree(self) -> Path:
+        if "bs" not in self._trees:
+            root = self.workdir / "bs-tree"
+            write_tree(
+                root,
+                self.scale["tree_files"],
+                ".bs",
+                lambda idx: json.dumps({"id": f"doc{idx}", "categories": []}),
+            )
+            self._trees["bs"] = root
+        return self._trees["bs"]
+
+
+# (name, prepare, unit): ``prepare`` builds whatever input the benchmark needs
+# and returns the function to time plus the amount of work it does, in units.
+Benchmark = Tuple[str, Callable[[], Tuple[Callable[[], object], float]], str]
+
+
+def build_benchmarks(corpus: Corpus) -> List[Benchmark]:
+    """Return the benchmarks over ``corpus``; nothing is generated until prepared."""
+
+    def inline_plan() -> Tuple[Callable[[], object], float]:
+        request = SkillRequest(messages=[Message(role="user", content=corpus.doc("huge"))])
+        return (lambda: plan(request, deterministic=True)), corpus.doc_mib("huge")
+
+    def load_huge() -> Tuple[Callable[[], object], float]:
+        skill_plan = _skill_plan("x", corpus.path("huge"))
+        return (lambda: load_source(skill_plan)), corpus.doc_mib("huge")
+
+    def prompt_huge() -> Tuple[Callable[[], object], float]:
+        skill_plan = _skill_plan("x", corpus.path("huge"))
+        text = corpus.doc("huge")
+        return (lambda: build_prompt(skill_plan, text)), corpus.doc_mib("huge")
+
+    benchmarks: List[Benchmark] = [
+        ("plan.inline-huge", inline_plan, "MiB"),
+        ("load_source.huge", load_huge, "MiB"),
+        ("build_prompt.huge", prompt_huge, "MiB"),
+    ]
+
+    def execute_doc(name: str, series: bool, wardley: bool) -> Callable[[], Tuple[Callable[[], object], float]]:
+        def prepare() -> Tuple[Callable[[], object], float]:
+            skill_plan = _skill_plan("x", corpus.path(name), series=series, wardley=wardley)
+            return (lambda: execute(skill_plan)), corpus.doc_mib(name)
+
+        return prepare
+
+    for name in Corpus._DOCS:
+        for mode, series, wardley in (
+            ("plain", False, False),
+            ("wardley", False, True),
+            ("series", True, False),
+        ):
+            benchmarks.append((f"execute.{mode}.{name}", execute_doc(name, series, wardley), "MiB"))
+
+    def cli_startup() -> Tuple[Callable[[], object], float]:
+        cli_input = "Generate a blockscape map for the domain of\nfile: " + corpus.path("flat") + "\n"
+        return (
+            lambda: subprocess.run(
+                [sys.executable, "-m", "skill.cli", "--provider", "codex", "--deterministic"],
+                input=cli_input,
+                text=True,
+                stdout=subprocess.DEVNULL,
+                check=True,
+                cwd=ROOT,
+            )
+        ), 1.0
+
+    def scan_tree() -> Tuple[Callable[[], object], float]:
+        root = str(corpus.md_tree())
+        return (lambda: watch_md.scan_files(root, min_bytes=0)), float(corpus.scale["tree_files"])
+
+    def convert(jobs: int) -> Callable[[], Tuple[Callable[[], object], float]]:
+        def prepare() -> Tuple[Callable[[], object], float]:
+            root = str(corpus.bs_tree())
+            return (
+                lambda: convert_bs_to_md.convert_tree(root, overwrite=True, jobs=jobs)
+            ), float(corpus.scale["tree_files"])
+
+        return prepare
+
+    benchmarks += [
+        ("cli.startup.deterministic", cli_startup, "runs"),
+        ("watch_md.scan_files", scan_tree, "files"),
+        ("convert_tree.serial", convert(1), "files"),
+        ("convert_tree.parallel", convert(os.cpu_count() or 1), "files"),
+    ]
+    return benchmarks
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[float, int]:
+    """Return the best wall time over ``repeat`` runs and the peak traced memory of one run."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def _read_baselines(path: Path) -> Dict[str, Dict[str, Dict[str, float]]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_baseline(path: Path, scale: str) -> Dict[str, Dict[str, float]]:
+    """Return the stored results for ``scale``; baselines for every scale share one file."""
+
+    return _read_baselines(path).get(scale, {})
+
+
+def save_baseline(path: Path, scale: str, results: Dict[str, Dict[str, float]]) -> None:
+    baselines = _read_baselines(path)
+    baselines[scale] = results
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument(
+        "--only",
+        action="append",
+        help="Run benchmarks whose name starts with this prefix (repeatable)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=str(DEFAULT_BASELINE),
+        help="Baseline file holding results per scale (defaults to .bench/baseline.json)",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Flag benchmarks this much slower than the baseline (0.25 = 25%%)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON instead of a table")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be >= 1")
+
+    baseline_path = Path(args.baseline)
+    baseline = load_baseline(baseline_path, args.scale)
+
+    results: Dict[str, Dict[str, float]] = {}
+    regressions: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="bs-bench-") as tmp:
+        benchmarks = build_benchmarks(Corpus(Path(tmp), SCALES[args.scale]))
+        for name, prepare, unit in benchmarks:
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            func, units = prepare()
+            seconds, peak = measure(func, args.repeat)
+            throughput = units / seconds if seconds else 0.0
+            results[name] = {"seconds": seconds, "throughput": throughput, "peak_bytes": peak}
+            previous = baseline.get(name, {}).get("seconds")
+            change = ""
+            if previous:
+                ratio = seconds / previous - 1
+                change = f"{ratio:+.0%}"
+                if ratio > args.threshold:
+                    regressions.append(name)
+                    change += " REGRESSION"
+            if not args.json:
+                print(
+                    f"{name:<28} {seconds * 1000:10.2f} ms {throughput:12.1f} {unit}/s "
+                    f"{peak / 1024:10.0f} KiB peak  {change}"
+                )
+
+    if args.json:
+        print(json.dumps({"scale": args.scale, "results": results, "regressions": regressions}, indent=2))
+    if args.save_baseline:
+        save_baseline(baseline_path, args.scale, results)
+        print(f"Saved baseline to {baseline_path}", file=sys.stderr)
+    if regressions:
+        print(
+            f"{len(regressions)} regression(s) against {baseline_path}: {', '.join(regressions)}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
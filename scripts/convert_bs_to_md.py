@@ -4,16 +4,19 @@
 This script scans a directory tree for `.bs` files, and for each one writes a
 Markdown companion named `<basename>-bs.md` using the standard Blockscape
 template (or a custom template if provided). Existing outputs are skipped unless
-`--overwrite` is set.
+`--overwrite` is set; `--incremental` only rewrites outputs older than their
+`.bs` source. `--jobs` spreads the work across processes.
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Optional, Tuple
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -40,28 +43,53 @@ def iter_bs_files(root: str) -> Iterable[str]:
                 yield os.path.join(dirpath, name)
 
 
+def is_up_to_date(path: str, out_path: str) -> bool:
+    """True when ``out_path`` exists and is at least as new as ``path``."""
+
+    try:
+        return os.stat(out_path).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def load_template(md_template: Optional[str] = None) -> str:
+    """Read and validate the markdown template once for a whole run."""
+
+    return watch_md.validate_md_template(watch_md.load_md_template(md_template))
+
+
 def convert_file(
     path: str,
     md_template: Optional[str] = None,
     overwrite: bool = False,
+    incremental: bool = False,
+    template: Optional[str] = None,
 ) -> Optional[str]:
     """Convert a single .bs file to ``-bs.md``.
 
-    Returns the output path when written, or ``None`` if skipped.
+    ``template`` is the already loaded template text; when omitted it is read
+    from ``md_template`` (or the default). Returns the output path when
+    written, or ``None`` if skipped.
     """
 
     out_path = watch_md.build_output_path(path, output_format="md")
 
-    if not overwrite and os.path.exists(out_path):
-        return None
+    if not overwrite:
+        if incremental:
+            if is_up_to_date(path, out_path):
+                return None
+        elif os.path.exists(out_path):
+            return None
 
+    if template is None:
+        template = load_template(md_template)
     json_text = Path(path).read_text(encoding="utf-8")
     md_filename = f"{Path(path).stem}.md"
 
-    formatted = watch_md.format_output(
+    formatted = watch_md.render_output(
         json_text,
         output_format="md",
-        md_template=md_template,
+        template=template,
         md_filename=md_filename,
     )
 
@@ -71,20 +99,48 @@ def convert_file(
     return out_path
 
 
+def _convert_one(
+    path: str, template: str, overwrite: bool, incremental: bool
+) -> Tuple[str, Optional[str], Optional[str]]:
+    try:
+        out = convert_file(path, overwrite=overwrite, incremental=incremental, template=template)
+    except Exception as exc:  # pragma: no cover - defensive logging
+        return path, None, str(exc)
+    return path, out, None
+
+
 def convert_tree(
     root: str,
     md_template: Optional[str] = None,
     overwrite: bool = False,
     verbose: bool = False,
+    incremental: bool = False,
+    jobs: int = 1,
+    template: Optional[str] = None,
 ) -> List[str]:
-    """Process all .bs files under ``root``. Returns list of written paths."""
+    """Process all .bs files under ``root``. Returns list of written paths.
+
+    ``template`` is the already loaded template text, handed to every
+    worker; when omitted it is read from ``md_template`` (or the default).
+    """
+
+    if template is None:
+        template = load_template(md_template)
+    convert = functools.partial(
+        _convert_one, template=template, overwrite=overwrite, incremental=incremental
+    )
+    paths = list(iter_bs_files(root))
+    if jobs > 1 and len(paths) > 1:
+        chunksize = max(1, min(256, len(paths) // (jobs * 8)))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(convert, paths, chunksize=chunksize))
+    else:
+        results = [convert(path) for path in paths]
 
     written: List[str] = []
-    for path in iter_bs_files(root):
-        try:
-            out = convert_file(path, md_template=md_template, overwrite=overwrite)
-        except Exception as exc:  # pragma: no cover - defensive logging
-            print(f"ERROR: failed to convert {path}: {exc}", file=sys.stderr)
+    for path, out, error in results:
+        if error is not None:
+            print(f"ERROR: failed to convert {path}: {error}", file=sys.stderr)
             continue
 
         if out:
@@ -112,6 +168,17 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Rewrite outputs even when the target -bs.md file already exists",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Rewrite existing outputs only when their .bs source is newer",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes (0 uses one per CPU)",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -124,12 +191,22 @@ def main() -> int:
     parser = build_arg_parser()
     args = parser.parse_args()
 
+    if args.jobs < 0:
+        parser.error("--jobs must be >= 0")
+    try:
+        template = load_template(args.md_template)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
     root = os.path.abspath(args.root)
     written = convert_tree(
         root,
         md_template=args.md_template,
         overwrite=args.overwrite,
         verbose=args.verbose,
+        incremental=args.incremental,
+        jobs=args.jobs or os.cpu_count() or 1,
+        template=template,
     )
 
     return 0 if written else 1
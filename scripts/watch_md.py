@@ -1,18 +1,38 @@
 #!/usr/bin/env python3
 import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import heapq
+import json
 import os
+import select
+import signal
+import struct
 import sys
+import threading
 import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Dict, Iterable, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from skill.adapters.claude import run_with_claude
-from skill.adapters.codex import run_with_codex
-from skill.adapters.codex_cli import run_with_codex_cli
+from skill.core.cache import configure_cache, get_cache
+from skill.core.incremental import (
+    build_update_prompt,
+    diff_sections,
+    load_sidecar,
+    merge_update,
+    needs_full_regeneration,
+    save_sidecar,
+    section_hashes,
+    split_sections,
+)
+from skill.providers import available_providers, complete_prompt, run_provider
 
 
 DEFAULT_MD_TEMPLATE = """# Blockscape Map of {mdfilename}
@@ -21,22 +41,38 @@ DEFAULT_MD_TEMPLATE = """# Blockscape Map of {mdfilename}
 {json}
 ```"""
 
+# Upper bound on concurrent generations per provider, regardless of --workers.
+DEFAULT_PROVIDER_LIMITS = {"claude": 4, "codex": 4, "codex-cli": 2}
+
+DEFAULT_STATE_FILE = ".watch_md_state.json"
+# Seconds between writes of the state file while the watcher runs.
+DEFAULT_STATE_SAVE_INTERVAL = 5.0
+# Content hashes are computed over fixed-size reads to bound memory.
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+# Upper bounds, in seconds, of the generation latency histogram buckets.
+LATENCY_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def is_watched_dir(name: str) -> bool:
+    return not name.startswith(".") and name not in {"__pycache__", "node_modules"}
+
+
+def is_md_source(name: str) -> bool:
+    if name.startswith("."):
+        return False
+    if name.endswith("-bs.md"):
+        # Skip generated markdown outputs
+        return False
+    ext = os.path.splitext(name)[1].lower()
+    return ext in {".md", ".markdown"}
+
 
 def iter_md_files(root: str) -> Iterable[str]:
     for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [
-            d
-            for d in dirnames
-            if not d.startswith(".") and d not in {"__pycache__", "node_modules"}
-        ]
+        dirnames[:] = [d for d in dirnames if is_watched_dir(d)]
         for name in filenames:
-            if name.startswith("."):
-                continue
-            if name.endswith("-bs.md"):
-                # Skip generated markdown outputs
-                continue
-            ext = os.path.splitext(name)[1].lower()
-            if ext in {".md", ".markdown"}:
+            if is_md_source(name):
                 yield os.path.join(dirpath, name)
 
 
@@ -58,11 +94,51 @@ def output_exists_for(path: str, output_format: str = "bs") -> bool:
 
 def generate_output(path: str, provider: str, deterministic: bool) -> str:
     prompt = f"Generate a blockscape map for the domain of\nfile: {path}"
-    if provider == "claude":
-        return run_with_claude(prompt, deterministic=deterministic)
-    if provider == "codex-cli":
-        return run_with_codex_cli(prompt, deterministic=deterministic)
-    return run_with_codex(prompt, deterministic=deterministic)
+    return run_provider(provider, prompt, deterministic=deterministic)
+
+
+def generate_incremental(
+    path: str,
+    provider: str,
+    deterministic: bool,
+    output_format: str = "bs",
+    verbose: bool = False,
+) -> Tuple[Optional[str], Dict[str, str]]:
+    """Regenerate only what changed since the last write.
+
+    Returns the new output (``None`` when no section changed) and the section
+    hashes to store with it. Without a usable sidecar, in deterministic mode,
+    or when most sections changed, this falls back to a full generation.
+    """
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as handle:
+        text = handle.read()
+    sections = split_sections(text)
+    hashes = section_hashes(sections)
+    out_path = build_output_path(path, output_format)
+    previous = load_sidecar(out_path) if os.path.exists(out_path) else None
+    if previous is None:
+        return generate_output(path, provider, deterministic), hashes
+
+    changed, removed = diff_sections(previous["sections"], hashes)
+    if not changed and not removed:
+        return None, hashes
+    if deterministic or needs_full_regeneration(changed, removed, len(hashes)):
+        return generate_output(path, provider, deterministic), hashes
+
+    prompt = build_update_prompt(previous["output"], sections, changed, removed)
+    try:
+        output = merge_update(previous["output"], complete_prompt(provider, prompt))
+    except ValueError as exc:
+        if verbose:
+            print(f"Incremental update of {path} failed ({exc}); regenerating", file=sys.stderr)
+        return generate_output(path, provider, deterministic), hashes
+    if verbose:
+        print(
+            f"Updated {path} from {len(changed) + len(removed)} changed section(s)",
+            file=sys.stderr,
+        )
+    return output, hashes
 
 
 def load_md_template(path: Optional[str]) -> str:
@@ -71,17 +147,22 @@ def load_md_template(path: Optional[str]) -> str:
     return DEFAULT_MD_TEMPLATE
 
 
-def format_output(
+def validate_md_template(template: str) -> str:
+    if "{json}" not in template:
+        raise ValueError("Markdown template must include '{json}' placeholder")
+    return template
+
+
+def render_output(
     output: str,
     output_format: str,
-    md_template: Optional[str],
+    template: str,
     md_filename: str,
 ) -> str:
+    """Like ``format_output`` but with already loaded and validated template text."""
+
     cleaned = output.rstrip("\n")
     if output_format == "md":
-        template = load_md_template(md_template)
-        if "{json}" not in template:
-            raise ValueError("Markdown template must include '{json}' placeholder")
         formatted = template.replace("{json}", cleaned).replace("{mdfilename}", md_filename)
     else:
         formatted = cleaned
@@ -90,6 +171,18 @@ def format_output(
     return formatted
 
 
+def format_output(
+    output: str,
+    output_format: str,
+    md_template: Optional[str],
+    md_filename: str,
+) -> str:
+    template = ""
+    if output_format == "md":
+        template = validate_md_template(load_md_template(md_template))
+    return render_output(output, output_format, template, md_filename)
+
+
 def write_output(
     source_path: str,
     output: str,
@@ -106,30 +199,776 @@ def write_output(
     return out_path
 
 
+def process_path(
+    path: str,
+    provider: str,
+    deterministic: bool,
+    output_format: str = "bs",
+    md_template: Optional[str] = None,
+    verbose: bool = False,
+    incremental: bool = False,
+) -> Optional[str]:
+    try:
+        if incremental:
+            output, hashes = generate_incremental(
+                path, provider, deterministic, output_format=output_format, verbose=verbose
+            )
+            if output is None:
+                if verbose:
+                    print(f"Unchanged sections in {path}; kept existing output", file=sys.stderr)
+                return build_output_path(path, output_format)
+        else:
+            output = generate_output(path, provider, deterministic)
+        out_path = write_output(
+            path,
+            output,
+            output_format=output_format,
+            md_template=md_template,
+        )
+        if incremental:
+            save_sidecar(out_path, hashes, output)
+    except Exception as exc:
+        print(f"ERROR: failed to process {path}: {exc}", file=sys.stderr)
+        return None
+    if verbose:
+        print(f"Wrote {out_path}", file=sys.stderr)
+    return out_path
+
+
+PRIORITY_EDIT = 0
+PRIORITY_BACKFILL = 1
+
+
+class GenerationPool:
+    """Run generation jobs on a fixed set of worker threads.
+
+    Jobs are taken from a priority queue: fresh edits (``PRIORITY_EDIT``) go
+    before backfill (``PRIORITY_BACKFILL``), and within a priority smaller
+    files go first when ``smaller_first`` is set, otherwise submission order.
+
+    A source path is never processed by two workers at once: submitting a path
+    that is already queued only raises its priority if needed, and submitting
+    one that is running schedules a single rerun once the current job
+    finishes. Each provider is additionally capped at its limit unless
+    ``limit_providers`` is false (deterministic runs call no provider): a
+    worker only takes a job whose provider has spare capacity, so jobs for a
+    busy provider stay queued in priority order instead of holding a worker.
+    ``max_backlog`` bounds queued backfill; edits are always accepted.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str], object],
+        workers: int = 1,
+        provider_limits: Optional[Dict[str, int]] = None,
+        smaller_first: bool = True,
+        max_backlog: Optional[int] = None,
+        limit_providers: bool = True,
+    ) -> None:
+        self._handler = handler
+        self._smaller_first = smaller_first
+        self._max_backlog = max_backlog
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._ready = threading.Condition(self._lock)
+        # path -> (heap key, provider) of its live queue entry; stale heap
+        # entries left behind by priority upgrades are skipped when popped.
+        self._queued: Dict[str, Tuple[Tuple[int, int, int, str], str]] = {}
+        self._running: Set[str] = set()
+        self._rerun: Dict[str, Tuple[str, int, int]] = {}
+        limits: Dict[str, int] = {}
+        if limit_providers:
+            limits.update(DEFAULT_PROVIDER_LIMITS)
+            limits.update(provider_limits or {})
+        self._limits = {name: max(1, count) for name, count in limits.items()}
+        self._active: Dict[str, int] = {}
+        self._threads: List[threading.Thread] = []
+        for idx in range(max(1, workers)):
+            thread = threading.Thread(
+                target=self._work, name=f"watch-md-worker-{idx}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self,
+        path: str,
+        provider: str,
+        priority: int = PRIORITY_EDIT,
+        size: int = 0,
+    ) -> bool:
+        """Queue ``path``; return False if it was merged into existing work or refused."""
+
+        with self._lock:
+            if path in self._running:
+                previous = self._rerun.get(path)
+                if previous is not None:
+                    priority = min(priority, previous[1])
+                self._rerun[path] = (provider, priority, size)
+                return False
+            existing = self._queued.get(path)
+            if existing is not None:
+                if priority < existing[0][0]:
+                    self._push(path, provider, priority, size)
+                return False
+            if priority != PRIORITY_EDIT and self._backlog_full():
+                return False
+            self._push(path, provider, priority, size)
+            return True
+
+    def _backlog_full(self) -> bool:
+        return self._max_backlog is not None and len(self._queued) >= self._max_backlog
+
+    def _push(self, path: str, provider: str, priority: int, size: int) -> None:
+        self._seq += 1
+        key = (priority, size if self._smaller_first else 0, self._seq, path)
+        self._queued[path] = (key, provider)
+        heapq.heappush(self._heap, key)
+        self._ready.notify()
+
+    def has_room(self) -> bool:
+        with self._lock:
+            return not self._backlog_full()
+
+    def depth(self) -> Dict[str, int]:
+        """Queue depth by kind, for progress reporting."""
+
+        with self._lock:
+            edits = sum(1 for key, _ in self._queued.values() if key[0] == PRIORITY_EDIT)
+            return {
+                "edits": edits,
+                "backfill": len(self._queued) - edits,
+                "running": len(self._running),
+            }
+
+    def join(self) -> None:
+        with self._idle:
+            while self._queued or self._running or self._rerun:
+                self._idle.wait()
+
+    def _at_limit(self, provider: str) -> bool:
+        limit = self._limits.get(provider)
+        return limit is not None and self._active.get(provider, 0) >= limit
+
+    def _take(self) -> Optional[Tuple[str, str]]:
+        # Pop the best live entry whose provider has spare capacity; entries
+        # for providers at their limit go back on the heap untouched.
+        skipped: List[Tuple[int, int, int, str]] = []
+        try:
+            while self._heap:
+                key = heapq.heappop(self._heap)
+                path = key[3]
+                entry = self._queued.get(path)
+                if entry is None or entry[0] != key:
+                    continue
+                if self._at_limit(entry[1]):
+                    skipped.append(key)
+                    continue
+                del self._queued[path]
+                return path, entry[1]
+            return None
+        finally:
+            for key in skipped:
+                heapq.heappush(self._heap, key)
+
+    def _next(self) -> Tuple[str, str]:
+        with self._ready:
+            while True:
+                job = self._take()
+                if job is not None:
+                    path, provider = job
+                    self._running.add(path)
+                    self._active[provider] = self._active.get(provider, 0) + 1
+                    return job
+                self._ready.wait()
+
+    def _work(self) -> None:
+        while True:
+            path, provider = self._next()
+            try:
+                self._handler(path, provider)
+            except Exception as exc:
+                print(f"ERROR: failed to process {path}: {exc}", file=sys.stderr)
+            finally:
+                with self._lock:
+                    self._running.discard(path)
+                    self._active[provider] -= 1
+                    # A provider slot just freed up for a waiting worker.
+                    self._ready.notify()
+                    rerun = self._rerun.pop(path, None)
+                    if rerun is not None:
+                        self._push(path, *rerun)
+                    self._idle.notify_all()
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class WatchMetrics:
+    """Operational counters for the watcher, rendered in the Prometheus text format.
+
+    Scans and generations are recorded as they happen; queue gauges are read
+    from the callable passed to ``render`` so they are current when scraped.
+    """
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.buckets = tuple(sorted(buckets))
+        self.scans = 0
+        self.scan_seconds = 0.0
+        self.last_scan_seconds = 0.0
+        self.files_scanned = 0
+        self.skipped = 0
+        self.generations: Dict[Tuple[str, str], int] = {}
+        self.bytes_written: Dict[str, int] = {}
+        # provider -> (per-bucket counts, sum, count)
+        self.latency: Dict[str, Tuple[List[int], float, int]] = {}
+
+    def observe_scan(self, seconds: float, files: int) -> None:
+        with self._lock:
+            self.scans += 1
+            self.scan_seconds += seconds
+            self.last_scan_seconds = seconds
+            self.files_scanned = files
+
+    def observe_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def observe_generation(self, provider: str, outcome: str, seconds: float, written: int = 0) -> None:
+        """Record one generation; ``outcome`` is ``success``, ``unchanged`` or ``failure``."""
+
+        with self._lock:
+            key = (provider, outcome)
+            self.generations[key] = self.generations.get(key, 0) + 1
+            if written:
+                self.bytes_written[provider] = self.bytes_written.get(provider, 0) + written
+            counts, total, count = self.latency.get(provider) or ([0] * len(self.buckets), 0.0, 0)
+            for idx, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[idx] += 1
+                    break
+            self.latency[provider] = (counts, total + seconds, count + 1)
+
+    def render(self, depth: Optional[Callable[[], Dict[str, int]]] = None) -> str:
+        queue = depth() if depth is not None else {}
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{labels} {_number(value)}")
+
+        with self._lock:
+            metric("watch_md_start_time_seconds", "gauge", "Unix time the watcher started.", [("", "", self.started)])
+            metric(
+                "watch_md_scan_duration_seconds",
+                "summary",
+                "Time spent in full directory scans.",
+                [("_sum", "", self.scan_seconds), ("_count", "", self.scans)],
+            )
+            metric(
+                "watch_md_last_scan_duration_seconds",
+                "gauge",
+                "Duration of the most recent full directory scan.",
+                [("", "", self.last_scan_seconds)],
+            )
+            metric(
+                "watch_md_files_scanned",
+                "gauge",
+                "Markdown files matching the filters in the most recent full scan.",
+                [("", "", self.files_scanned)],
+            )
+            metric(
+                "watch_md_queue_depth",
+                "gauge",
+                "Jobs waiting to be generated, by kind.",
+                [("", _labels(kind=kind), queue.get(kind, 0)) for kind in ("edits", "backfill", "waiting")],
+            )
+            metric(
+                "watch_md_generations_in_flight",
+                "gauge",
+                "Generations currently running.",
+                [("", "", queue.get("running", 0))],
+            )
+            metric(
+                "watch_md_generations_total",
+                "counter",
+                "Finished generations by provider and outcome.",
+                [
+                    ("", _labels(provider=provider, outcome=outcome), value)
+                    for (provider, outcome), value in sorted(self.generations.items())
+                ],
+            )
+            metric(
+                "watch_md_generations_skipped_total",
+                "counter",
+                "Changes skipped because the file content was unchanged.",
+                [("", "", self.skipped)],
+            )
+            metric(
+                "watch_md_output_bytes_total",
+                "counter",
+                "Bytes of output written, by provider.",
+                [("", _labels(provider=provider), value) for provider, value in sorted(self.bytes_written.items())],
+            )
+            samples: List[Tuple[str, str, float]] = []
+            for provider, (counts, total, count) in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, counts):
+                    cumulative += bucket
+                    samples.append(("_bucket", _labels(provider=provider, le=_number(bound)), cumulative))
+                samples.append(("_bucket", _labels(provider=provider, le="+Inf"), count))
+                samples.append(("_sum", _labels(provider=provider), total))
+                samples.append(("_count", _labels(provider=provider), count))
+            metric(
+                "watch_md_generation_duration_seconds",
+                "histogram",
+                "Wall time of each generation, by provider.",
+                samples,
+            )
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(host: str, port: int, render: Callable[[], str]) -> ThreadingHTTPServer:
+    """Serve ``render()`` at ``/metrics`` from a daemon thread and return the server."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            return None
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="watch-md-metrics", daemon=True)
+    thread.start()
+    return server
+
+
+def write_metrics_file(path: str, render: Callable[[], str]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(render())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_file_writer(path: str, interval: float, render: Callable[[], str]) -> threading.Thread:
+    """Rewrite ``path`` every ``interval`` seconds, for node_exporter's textfile collector."""
+
+    def loop() -> None:
+        while True:
+            try:
+                write_metrics_file(path, render)
+            except OSError as exc:
+                print(f"WARNING: failed to write metrics to {path}: {exc}", file=sys.stderr)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="watch-md-metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def parse_provider_limits(values: Optional[List[str]]) -> Dict[str, int]:
+    limits: Dict[str, int] = {}
+    for value in values or []:
+        name, sep, count = value.partition("=")
+        if not sep or name not in available_providers():
+            raise ValueError(f"Invalid provider limit '{value}' (expected PROVIDER=N)")
+        try:
+            limits[name] = int(count)
+        except ValueError as exc:
+            raise ValueError(f"Invalid provider limit '{value}' (expected PROVIDER=N)") from exc
+        if limits[name] < 1:
+            raise ValueError(f"Provider limit for '{name}' must be >= 1")
+    return limits
+
+
+def age_cutoff_ns(max_age_days: Optional[float]) -> Optional[int]:
+    if max_age_days is None:
+        return None
+    return time.time_ns() - int(max_age_days * 24 * 60 * 60 * 1_000_000_000)
+
+
+def check_path(
+    path: str,
+    min_bytes: int,
+    output_format: str = "bs",
+    cutoff_ns: Optional[int] = None,
+    include_existing: bool = False,
+) -> Optional[Tuple[int, int]]:
+    """Return the signature of ``path`` if it should be generated, else ``None``.
+
+    ``include_existing`` keeps sources that already have an output, so edits
+    to them are picked up (incremental mode).
+    """
+
+    try:
+        if not include_existing and output_exists_for(path, output_format=output_format):
+            return None
+        sig = file_signature(path)
+    except FileNotFoundError:
+        return None
+    if sig[1] < min_bytes:
+        return None
+    if cutoff_ns is not None and sig[0] < cutoff_ns:
+        return None
+    return sig
+
+
 def scan_files(
     root: str,
     min_bytes: int,
     output_format: str = "bs",
     max_age_days: Optional[float] = None,
+    include_existing: bool = False,
 ) -> Dict[str, Tuple[int, int]]:
     seen: Dict[str, Tuple[int, int]] = {}
-    cutoff_ns: Optional[int] = None
-    if max_age_days is not None:
-        cutoff_ns = time.time_ns() - int(max_age_days * 24 * 60 * 60 * 1_000_000_000)
+    cutoff_ns = age_cutoff_ns(max_age_days)
 
     for path in iter_md_files(root):
+        sig = check_path(
+            path,
+            min_bytes,
+            output_format=output_format,
+            cutoff_ns=cutoff_ns,
+            include_existing=include_existing,
+        )
+        if sig is not None:
+            seen[path] = sig
+    return seen
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        return file_signature(path)
+    except OSError:
+        return None
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_output_sig(entry: Dict[str, object]) -> Optional[Tuple[int, int]]:
+    mtime_ns, size = entry.get("output_mtime_ns"), entry.get("output_size")
+    if isinstance(mtime_ns, int) and isinstance(size, int):
+        return (mtime_ns, size)
+    return None
+
+
+class WatchState:
+    """Per-source record of the last successful generation, persisted as JSON.
+
+    Each entry maps a source path to its ``mtime_ns``, ``size`` and
+    ``content_hash`` when it was generated, plus the ``output_hash`` and
+    ``output_mtime_ns``/``output_size`` of what was written. ``path=None``
+    keeps the state in memory only.
+
+    Changes are written out by ``flush``, at most once per ``save_interval``
+    seconds unless forced, so recording stays O(1) however many files are
+    tracked.
+    """
+
+    def __init__(self, path: Optional[str], save_interval: float = DEFAULT_STATE_SAVE_INTERVAL) -> None:
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, object]] = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if path:
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            print(f"WARNING: ignoring unreadable state file {path}: {exc}", file=sys.stderr)
+            return
+        entries = data.get("files") if isinstance(data, dict) else None
+        if isinstance(entries, dict):
+            self._entries = {
+                source: entry for source, entry in entries.items() if isinstance(entry, dict)
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, path: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            return dict(entry) if entry is not None else None
+
+    def is_current(self, path: str, sig: Tuple[int, int], output_path: Optional[str] = None) -> bool:
+        """True when ``path`` was generated from exactly its current content.
+
+        Only hashes the file when the stat signature moved; a matching hash
+        refreshes the stored signature so the next check is stat-only again.
+        With ``output_path``, the recorded output must also still be on disk
+        unchanged, so deleting an output always triggers a regeneration; it
+        is checked the same way, by stat first and by hash only if that moved.
+        """
+
+        entry = self.get(path)
+        if entry is None:
+            return False
+        output_sig = _entry_output_sig(entry)
+        if output_path is not None:
+            output_sig = self._current_output_sig(output_path, entry)
+            if output_sig is None:
+                return False
+        source_matches = (entry.get("mtime_ns"), entry.get("size")) == sig
+        digest = entry.get("content_hash")
+        if not source_matches:
+            try:
+                digest = content_hash(path)
+            except OSError:
+                return False
+            if digest != entry.get("content_hash"):
+                return False
+        if not source_matches or output_sig != _entry_output_sig(entry):
+            self.record(path, sig, str(digest), entry.get("output_hash"), output_sig)
+        return True
+
+    @staticmethod
+    def _current_output_sig(output_path: str, entry: Dict[str, object]) -> Optional[Tuple[int, int]]:
+        # Returns the output's stat signature if it still holds what was
+        # recorded, None otherwise.
+        output_sig = _stat_signature(output_path)
+        output_hash = entry.get("output_hash")
+        if output_sig is None or output_hash is None or output_sig == _entry_output_sig(entry):
+            return output_sig
+        try:
+            matches = content_hash(output_path) == output_hash
+        except OSError:
+            return None
+        return output_sig if matches else None
+
+    def record(
+        self,
+        path: str,
+        sig: Tuple[int, int],
+        digest: str,
+        output_hash: Optional[object],
+        output_sig: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        with self._lock:
+            self._entries[path] = {
+                "mtime_ns": sig[0],
+                "size": sig[1],
+                "content_hash": digest,
+                "output_hash": output_hash,
+                "output_mtime_ns": output_sig[0] if output_sig else None,
+                "output_size": output_sig[1] if output_sig else None,
+            }
+            self._dirty = True
+
+    def forget(self, path: str) -> None:
+        """Drop the entry of a source that no longer exists."""
+
+        with self._lock:
+            if self._entries.pop(path, None) is not None:
+                self._dirty = True
+
+    def flush(self, force: bool = False) -> None:
+        """Write pending changes if ``save_interval`` has passed (or ``force``)."""
+
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            if not force and time.monotonic() - self._saved_at < self.save_interval:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump({"version": 1, "files": entries}, handle)
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            print(f"WARNING: failed to save state file {self.path}: {exc}", file=sys.stderr)
+            with self._lock:
+                self._dirty = True
+
+
+def source_candidates(path: str) -> List[str]:
+    """Map a changed path to the markdown sources whose eligibility it affects.
+
+    Outputs count too: deleting ``topic.bs`` makes ``topic.md`` eligible again.
+    """
+
+    name = os.path.basename(path)
+    if name.startswith("."):
+        return []
+    if name.endswith("-bs.md"):
+        base = path[: -len("-bs.md")]
+    elif name.lower().endswith(".bs"):
+        base = path[: -len(".bs")]
+    elif is_md_source(name):
+        return [path]
+    else:
+        return []
+    return [base + ".md", base + ".markdown"]
+
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Recursive inotify watcher that reports settled markdown source paths.
+
+    A path is only reported once no further events arrived for it during the
+    debounce window, so editors that save in several writes trigger one
+    generation. ``overflowed`` is set when the kernel event queue overflowed
+    and the caller has to fall back to a full scan.
+    """
+
+    def __init__(self, root: str, debounce: float = 0.5) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._debounce = debounce
+        self._dirs: Dict[int, str] = {}
+        self._pending: Dict[str, float] = {}
+        self.overflowed = False
         try:
-            if output_exists_for(path, output_format=output_format):
+            self.watch_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def watch_tree(self, root: str) -> List[str]:
+        """Watch ``root`` and its subdirectories; return markdown sources found."""
+
+        found: List[str] = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if is_watched_dir(d)]
+            wd = self._add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"inotify_add_watch failed for {dirpath}: {os.strerror(err)}")
+            self._dirs[wd] = dirpath
+            found.extend(os.path.join(dirpath, name) for name in filenames if is_md_source(name))
+        return found
+
+    def poll(self, timeout: float) -> List[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if ready:
+            self._drain()
+        now = time.monotonic()
+        settled = [path for path, last in self._pending.items() if now - last >= self._debounce]
+        for path in settled:
+            del self._pending[path]
+        return sorted(settled)
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            if not data:
+                return
+            self._parse(data)
+
+    def _parse(self, data: bytes) -> None:
+        now = time.monotonic()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                self.overflowed = True
                 continue
-            sig = file_signature(path)
-            if sig[1] < min_bytes:
+            dirpath = self._dirs.get(wd)
+            if dirpath is None:
                 continue
-            if cutoff_ns is not None and sig[0] < cutoff_ns:
+            if mask & _IN_IGNORED:
+                del self._dirs[wd]
                 continue
-            seen[path] = sig
-        except FileNotFoundError:
-            continue
-    return seen
+            name = os.fsdecode(raw_name)
+            path = os.path.join(dirpath, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and is_watched_dir(name):
+                    try:
+                        added = self.watch_tree(path)
+                    except OSError:
+                        continue
+                    for source in added:
+                        self._pending[source] = now
+                continue
+            for source in source_candidates(path):
+                self._pending[source] = now
 
 
 def confirm_initial_processing(
@@ -157,7 +996,7 @@ def confirm_initial_processing(
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--root", default=".", help="Root directory to watch")
-    parser.add_argument("--provider", choices=["claude", "codex", "codex-cli"], default="codex-cli")
+    parser.add_argument("--provider", choices=available_providers(), default="codex-cli")
     parser.add_argument("--interval", type=float, default=1.0, help="Polling interval in seconds")
     parser.add_argument("--min-bytes", type=int, default=5000, help="Ignore markdown files smaller than this many bytes")
     parser.add_argument(
@@ -174,65 +1013,305 @@ def main() -> int:
         "--md-template",
         help="Path to a markdown template containing a '{json}' placeholder (used when --output-format=md); '{mdfilename}' is also available",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["auto", "inotify", "poll"],
+        default="auto",
+        help="Change detection backend; 'auto' uses inotify when available and falls back to polling",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="Seconds a file must stay quiet before an inotify change is processed",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for the persistent result cache (defaults to $BLOCKSCAPE_CACHE_DIR; disabled when unset)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=None,
+        help="Evict least recently used cache entries beyond this size",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Also watch sources that already have an output and regenerate only their changed sections",
+    )
+    parser.add_argument(
+        "--state-file",
+        help=f"Where to persist per-file generation state (defaults to {DEFAULT_STATE_FILE} under --root)",
+    )
+    parser.add_argument(
+        "--no-state",
+        action="store_true",
+        help="Keep generation state in memory only",
+    )
+    parser.add_argument(
+        "--queue-order",
+        choices=["smallest", "fifo"],
+        default="smallest",
+        help="Order of queued jobs within a priority (edits always run before backfill)",
+    )
+    parser.add_argument(
+        "--max-backlog",
+        type=int,
+        default=100,
+        help="Maximum backfill jobs queued at once; the rest wait outside the queue",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics at http://HOST:PORT/metrics",
+    )
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address for --metrics-port to listen on")
+    parser.add_argument(
+        "--metrics-file",
+        help="Periodically rewrite this file with Prometheus metrics (e.g. for node_exporter's textfile collector)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        help="Seconds between --metrics-file rewrites",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of files to generate concurrently")
+    parser.add_argument(
+        "--provider-limit",
+        action="append",
+        metavar="PROVIDER=N",
+        help="Cap concurrent generations for a provider (repeatable; defaults: claude=4, codex=4, codex-cli=2; ignored with --deterministic)",
+    )
     args = parser.parse_args()
+    if args.debounce < 0:
+        parser.error("--debounce must be >= 0")
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.max_backlog < 1:
+        parser.error("--max-backlog must be >= 1")
+    try:
+        provider_limits = parse_provider_limits(args.provider_limit)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.cache_max_mb is not None and args.cache_max_mb <= 0:
+        parser.error("--cache-max-mb must be > 0")
     if args.min_bytes < 0:
         parser.error("--min-bytes must be >= 0")
     if args.max_age_days is not None and args.max_age_days < 0:
         parser.error("--max-age-days must be >= 0")
+    if args.metrics_port is not None and not 0 <= args.metrics_port <= 65535:
+        parser.error("--metrics-port must be between 0 and 65535")
+    if args.metrics_interval <= 0:
+        parser.error("--metrics-interval must be > 0")
 
     root = os.path.abspath(args.root)
-    seen = scan_files(
-        root,
-        args.min_bytes,
-        output_format=args.output_format,
-        max_age_days=args.max_age_days,
-    )
+    if args.cache_dir:
+        max_bytes = int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None
+        configure_cache(args.cache_dir, max_bytes)
+    cache = None if args.deterministic else get_cache()
+    state_path = None if args.no_state else (args.state_file or os.path.join(root, DEFAULT_STATE_FILE))
+    state = WatchState(state_path)
+    metrics = WatchMetrics()
 
-    if args.initial:
-        initial_paths = sorted(seen.keys())
-        if confirm_initial_processing(len(initial_paths), args.min_bytes, args.max_age_days):
-            for path in initial_paths:
-                try:
-                    output = generate_output(path, args.provider, args.deterministic)
-                    out_path = write_output(
-                        path,
-                        output,
-                        output_format=args.output_format,
-                        md_template=args.md_template,
-                    )
-                    if args.verbose:
-                        print(f"Wrote {out_path}", file=sys.stderr)
-                except Exception as exc:
-                    print(f"ERROR: failed to process {path}: {exc}", file=sys.stderr)
+    def handle(path: str, provider: str) -> None:
+        # Snapshot before generating so an edit made mid-generation still
+        # looks changed afterwards.
+        try:
+            sig = file_signature(path)
+            digest = content_hash(path)
+        except OSError:
+            sig = None
+        out_before = _stat_signature(build_output_path(path, args.output_format))
+        start = time.perf_counter()
+        out_path = process_path(
+            path,
+            provider,
+            args.deterministic,
+            output_format=args.output_format,
+            md_template=args.md_template,
+            verbose=args.verbose,
+            incremental=args.incremental,
+        )
+        elapsed = time.perf_counter() - start
+        if out_path is None:
+            metrics.observe_generation(provider, "failure", elapsed)
         else:
-            print("Cancelled", file=sys.stderr)
+            out_after = _stat_signature(out_path)
+            if out_after is None or out_after == out_before:
+                metrics.observe_generation(provider, "unchanged", elapsed)
+            else:
+                metrics.observe_generation(provider, "success", elapsed, out_after[1])
+        if out_path is not None and sig is not None:
+            output_sig = _stat_signature(out_path)
+            try:
+                output_hash = content_hash(out_path)
+            except OSError:
+                output_hash, output_sig = None, None
+            state.record(path, sig, digest, output_hash, output_sig)
+        if args.verbose and cache is not None:
+            stats = cache.stats()
+            print(
+                f"Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} entries ({stats['bytes']} bytes)",
+                file=sys.stderr,
+            )
+        if args.verbose:
+            depth = pool.depth()
+            print(
+                f"Queue: {depth['edits']} edits, {depth['backfill']} backfill queued "
+                f"({len(backfill)} waiting), {depth['running']} running",
+                file=sys.stderr,
+            )
+
+    backfill: "deque[Tuple[str, Tuple[int, int]]]" = deque()
+    pool = GenerationPool(
+        handle,
+        workers=args.workers,
+        provider_limits=provider_limits,
+        smaller_first=args.queue_order == "smallest",
+        max_backlog=args.max_backlog,
+        limit_providers=not args.deterministic,
+    )
+
+    def queue_depth() -> Dict[str, int]:
+        depth = pool.depth()
+        depth["waiting"] = len(backfill)
+        return depth
+
+    def render_metrics() -> str:
+        return metrics.render(queue_depth)
+
+    if args.metrics_port is not None:
+        try:
+            metrics_server = serve_metrics(args.metrics_host, args.metrics_port, render_metrics)
+        except OSError as exc:
+            print(f"ERROR: cannot serve metrics on port {args.metrics_port}: {exc}", file=sys.stderr)
             return 1
+        if args.verbose:
+            host, port = metrics_server.server_address[:2]
+            print(f"Serving metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    if args.metrics_file:
+        start_metrics_file_writer(args.metrics_file, args.metrics_interval, render_metrics)
 
-    while True:
-        time.sleep(args.interval)
-        current = scan_files(
+    def full_scan() -> Dict[str, Tuple[int, int]]:
+        start = time.perf_counter()
+        found = scan_files(
             root,
             args.min_bytes,
             output_format=args.output_format,
             max_age_days=args.max_age_days,
+            include_existing=args.incremental,
         )
+        metrics.observe_scan(time.perf_counter() - start, len(found))
+        return found
+
+    watcher: Optional[InotifyWatcher] = None
+    if args.backend != "poll":
+        try:
+            watcher = InotifyWatcher(root, debounce=args.debounce)
+        except OSError as exc:
+            if args.backend == "inotify":
+                print(f"ERROR: inotify backend unavailable: {exc}", file=sys.stderr)
+                return 1
+            if args.verbose:
+                print(f"inotify unavailable ({exc}); falling back to polling", file=sys.stderr)
+
+    seen = full_scan()
+
+    avoided = 0
+
+    def is_current(path: str, sig: Tuple[int, int]) -> bool:
+        return state.is_current(path, sig, build_output_path(path, args.output_format))
 
-        for path, sig in current.items():
-            if path not in seen or seen[path] != sig:
-                try:
-                    output = generate_output(path, args.provider, args.deterministic)
-                    out_path = write_output(
-                        path,
-                        output,
-                        output_format=args.output_format,
-                        md_template=args.md_template,
-                    )
+    def submit_changed(path: str, sig: Tuple[int, int]) -> None:
+        # A new stat signature with the same bytes (checkout, rsync, formatter)
+        # does not warrant a regeneration.
+        nonlocal avoided
+        if is_current(path, sig):
+            avoided += 1
+            metrics.observe_skip()
+            if args.verbose:
+                print(
+                    f"Content unchanged for {path}; skipped ({avoided} generations avoided)",
+                    file=sys.stderr,
+                )
+            return
+        pool.submit(path, args.provider, PRIORITY_EDIT, sig[1])
+
+    def feed_backfill() -> None:
+        while backfill and pool.has_room():
+            path, sig = backfill.popleft()
+            # Skip anything an edit already regenerated while it waited.
+            if not is_current(path, sig):
+                pool.submit(path, args.provider, PRIORITY_BACKFILL, sig[1])
+
+    # Files generated before a restart that changed while we were down.
+    resumed = sorted(
+        path for path in seen if state.get(path) is not None and not is_current(path, seen[path])
+    )
+    backfill.extend((path, seen[path]) for path in resumed)
+    if args.verbose and state_path:
+        print(
+            f"State: {len(state)} known files, {len(resumed)} changed or missing an output since last run",
+            file=sys.stderr,
+        )
+
+    if args.initial:
+        initial_paths = sorted(
+            path for path in seen if state.get(path) is None
+        )
+        if confirm_initial_processing(len(initial_paths), args.min_bytes, args.max_age_days):
+            backfill.extend((path, seen[path]) for path in initial_paths)
+        else:
+            print("Cancelled", file=sys.stderr)
+            return 1
+
+    # Turn SIGTERM into a normal exit so pending state is written out.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            feed_backfill()
+            state.flush()
+            if watcher is None or watcher.overflowed:
+                if watcher is None:
+                    time.sleep(args.interval)
+                else:
+                    watcher.overflowed = False
                     if args.verbose:
-                        print(f"Wrote {out_path}", file=sys.stderr)
-                except Exception as exc:
-                    print(f"ERROR: failed to process {path}: {exc}", file=sys.stderr)
+                        print("inotify queue overflowed; rescanning", file=sys.stderr)
+                current = full_scan()
+
+                for path, sig in current.items():
+                    if path not in seen or seen[path] != sig:
+                        submit_changed(path, sig)
+                for path in seen.keys() - current.keys():
+                    if not os.path.exists(path):
+                        state.forget(path)
+
+                seen = current
+                continue
 
-        seen = current
+            cutoff_ns = age_cutoff_ns(args.max_age_days)
+            for path in watcher.poll(args.interval):
+                sig = check_path(
+                    path,
+                    args.min_bytes,
+                    output_format=args.output_format,
+                    cutoff_ns=cutoff_ns,
+                    include_existing=args.incremental,
+                )
+                if sig is None:
+                    seen.pop(path, None)
+                    if not os.path.exists(path):
+                        state.forget(path)
+                    continue
+                if seen.get(path) != sig:
+                    submit_changed(path, sig)
+                seen[path] = sig
+    finally:
+        state.flush(force=True)
 
 
 if __name__ == "__main__":
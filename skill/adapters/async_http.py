@@ -0,0 +1,161 @@
+import asyncio
+import ssl
+import weakref
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from skill.adapters.http_pool import HTTPStatusError, pool_size, split_url
+
+_DEFAULT_TIMEOUT = 120.0
+
+_Stream = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class _Response:
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes, reusable: bool):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.reusable = reusable
+
+
+async def _read_response(reader: asyncio.StreamReader) -> _Response:
+    while True:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("server closed the connection")
+        parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if status != 100:
+            break
+
+    reusable = headers.get("connection", "").lower() != "close"
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks: List[bytes] = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        reusable = False
+    return _Response(status, reason, headers, body, reusable)
+
+
+class AsyncConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one origin for a single event loop."""
+
+    def __init__(self, scheme: str, host: str, port: int, size: int) -> None:
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[_Stream] = []
+        self._ssl = ssl.create_default_context() if scheme == "https" else None
+        self.connections_opened = 0
+
+    async def _connect(self) -> _Stream:
+        self.connections_opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+
+    async def _send(self, stream: _Stream, method: str, path: str, body: bytes, headers: Mapping[str, str]) -> _Response:
+        reader, writer = stream
+        host = self.host if self.port in (80, 443) else f"{self.host}:{self.port}"
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        return await _read_response(reader)
+
+    async def _exchange(self, method: str, path: str, body: bytes, headers: Mapping[str, str]) -> _Response:
+        while True:
+            reused = bool(self._idle)
+            stream = self._idle.pop() if reused else await self._connect()
+            try:
+                response = await self._send(stream, method, path, body, headers)
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+                stream[1].close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                stream[1].close()
+                raise
+            if response.reusable:
+                self._idle.append(stream)
+            else:
+                stream[1].close()
+            return response
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> _Response:
+        """Send one request; ``timeout`` covers connect, send and read, not the wait for a slot."""
+
+        async with self._slots:
+            return await asyncio.wait_for(self._exchange(method, path, body, headers or {}), timeout)
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _reader, writer in idle:
+            writer.close()
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str, int], AsyncConnectionPool]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_pool(url: str) -> AsyncConnectionPool:
+    """Return the pool for the origin of ``url`` on the running event loop."""
+
+    scheme, host, port, _path = split_url(url)
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    key = (scheme, host, port)
+    pool = pools.get(key)
+    if pool is None:
+        pool = AsyncConnectionPool(scheme, host, port, size=pool_size())
+        pools[key] = pool
+    return pool
+
+
+async def apost(
+    url: str,
+    body: bytes,
+    headers: Mapping[str, str],
+    timeout: float = _DEFAULT_TIMEOUT,
+) -> bytes:
+    """Async counterpart of ``http_pool.post``."""
+
+    _scheme, _host, _port, path = split_url(url)
+    pool = get_pool(url)
+    try:
+        response = await pool.request("POST", path, body, headers, timeout=timeout)
+    except asyncio.TimeoutError as exc:
+        raise TimeoutError(f"timed out after {timeout:g}s waiting for {url}") from exc
+    except (asyncio.IncompleteReadError, ValueError) as exc:
+        raise ConnectionError(f"malformed HTTP response from {url}: {exc}") from exc
+    if response.status >= 400:
+        raise HTTPStatusError(response.status, response.reason, response.body, response.headers)
+    return response.body
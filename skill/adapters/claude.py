@@ -1,12 +1,19 @@
+import asyncio
 import json
 import os
-import urllib.request
+from typing import Callable, Dict, Optional, Tuple
 
+from skill.adapters import async_http, http_pool
+from skill.adapters.ratelimit import acall_with_retry, call_with_retry
+from skill.core.cache import acached_call, cached_call
 from skill.core.executor import execute
-from skill.core.planner import plan
-from skill.core.prompt import build_prompt
-from skill.core.source import load_source
-from skill.core.types import Message, SkillRequest
+from skill.core.prompt import PromptText, prompt_parts
+from skill.core.skill import plan_text, prepare_prompt_parts
+
+_DEFAULT_BASE_URL = "https://api.anthropic.com"
+_TEMPERATURE = 0.2
+_DEFAULT_TIMEOUT = 120.0
+
 
 def _require_env(name: str) -> str:
     value = os.environ.get(name)
@@ -15,8 +22,8 @@ def _require_env(name: str) -> str:
     return value
 
 
-def _call_anthropic(prompt: str) -> str:
-    base_url = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+def _build_request(prompt: PromptText, stream: bool = False) -> Tuple[str, bytes, Dict[str, str], float]:
+    base_url = os.environ.get("ANTHROPIC_BASE_URL", _DEFAULT_BASE_URL)
     api_key = _require_env("ANTHROPIC_API_KEY")
     model = _require_env("ANTHROPIC_MODEL")
 
@@ -24,33 +31,108 @@ def _call_anthropic(prompt: str) -> str:
     payload = {
         "model": model,
         "max_tokens": 4000,
-        "temperature": 0.2,
-        "messages": [{"role": "user", "content": prompt}],
+        "temperature": _TEMPERATURE,
+        "messages": [{"role": "user", "content": http_pool.TEXT_SLOT}],
     }
+    if stream:
+        payload["stream"] = True
     headers = {
         "x-api-key": api_key,
         "anthropic-version": "2023-06-01",
         "content-type": "application/json",
     }
+    timeout = float(os.environ.get("ANTHROPIC_TIMEOUT", _DEFAULT_TIMEOUT))
+    return url, http_pool.json_body(payload, prompt_parts(prompt)), headers, timeout
 
-    req = urllib.request.Request(
-        url, data=json.dumps(payload).encode("utf-8"), headers=headers
-    )
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
+
+def _parse_response(body: bytes) -> str:
+    data = json.loads(body.decode("utf-8"))
     try:
         return data["content"][0]["text"]
     except (KeyError, IndexError, TypeError) as exc:
         raise RuntimeError(f"Unexpected LLM response shape: {data}") from exc
 
 
-def run_with_claude(user_text: str, deterministic: bool = False) -> str:
-    req = SkillRequest(messages=[Message(role="user", content=user_text)])
+def _stream_anthropic(
+    url: str, body: bytes, headers: dict, timeout: float, on_text: Callable[[str], None]
+) -> str:
+    parts = []
+    for _event, data in http_pool.iter_sse(http_pool.post_stream(url, body, headers, timeout=timeout)):
+        message = json.loads(data)
+        kind = message.get("type")
+        if kind == "content_block_delta":
+            text = message.get("delta", {}).get("text")
+            if text:
+                parts.append(text)
+                on_text(text)
+        elif kind == "error":
+            raise RuntimeError(f"LLM stream error: {message.get('error')}")
+    return "".join(parts)
+
+
+def _call_anthropic(prompt: PromptText, on_text: Optional[Callable[[str], None]] = None) -> str:
+    url, body, headers, timeout = _build_request(prompt, stream=on_text is not None)
+    if on_text is not None:
+        return call_with_retry(
+            "claude",
+            prompt,
+            lambda: _stream_anthropic(url, body, headers, timeout, on_text),
+            retry_network=False,
+        )
+    response = call_with_retry(
+        "claude", prompt, lambda: http_pool.post(url, body, headers, timeout=timeout)
+    )
+    return _parse_response(response)
+
+
+async def _acall_anthropic(prompt: PromptText) -> str:
+    url, body, headers, timeout = _build_request(prompt)
+    response = await acall_with_retry(
+        "claude", prompt, lambda: async_http.apost(url, body, headers, timeout=timeout)
+    )
+    return _parse_response(response)
+
+
+def _cache_identity() -> Dict[str, object]:
+    return {
+        "model": os.environ.get("ANTHROPIC_MODEL", ""),
+        "temperature": _TEMPERATURE,
+        "endpoint": os.environ.get("ANTHROPIC_BASE_URL", _DEFAULT_BASE_URL),
+    }
+
+
+def complete_with_claude(prompt: PromptText) -> str:
+    """Send a ready-made prompt, bypassing the skill planner and template."""
+
+    return cached_call(prompt, _call_anthropic, "claude", **_cache_identity())
+
+
+def run_with_claude(
+    user_text: str,
+    deterministic: bool = False,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    skill_plan = plan_text(user_text, deterministic=deterministic)
+    if deterministic:
+        output = execute(skill_plan)
+        if on_text is not None:
+            on_text(output)
+        return output
+
+    prompt = prepare_prompt_parts(skill_plan)
+    return cached_call(
+        prompt,
+        lambda text: _call_anthropic(text, on_text),
+        "claude",
+        on_hit=on_text,
+        **_cache_identity(),
+    )
+
+
+async def arun_with_claude(user_text: str, deterministic: bool = False) -> str:
+    skill_plan = await asyncio.to_thread(plan_text, user_text, deterministic)
     if deterministic:
-        skill_plan = plan(req, deterministic=True)
-        return execute(skill_plan)
+        return await asyncio.to_thread(execute, skill_plan)
 
-    skill_plan = plan(req, deterministic=False)
-    source_text, _title_hint = load_source(skill_plan)
-    prompt = build_prompt(skill_plan, source_text)
-    return _call_anthropic(prompt)
+    prompt = await asyncio.to_thread(prepare_prompt_parts, skill_plan)
+    return await acached_call(prompt, _acall_anthropic, "claude", **_cache_identity())
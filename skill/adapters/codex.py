@@ -1,69 +1,153 @@
+import asyncio
 import json
 import os
-import urllib.error
-import urllib.request
+from typing import Callable, Dict, Optional, Tuple
 
+from skill.adapters import async_http, http_pool
+from skill.adapters.ratelimit import acall_with_retry, call_with_retry
+from skill.core.cache import acached_call, cached_call
 from skill.core.executor import execute
-from skill.core.planner import plan
-from skill.core.prompt import build_prompt
-from skill.core.source import load_source
-from skill.core.types import Message, SkillRequest
+from skill.core.prompt import PromptText, prompt_parts
+from skill.core.skill import plan_text, prepare_prompt_parts
 
+_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+_TEMPERATURE = 0.2
+_DEFAULT_TIMEOUT = 1020.0
 
-def _call_openai_chat(prompt: str) -> str:
-    base_url = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+def _build_request(prompt: PromptText, stream: bool = False) -> Tuple[str, bytes, Dict[str, str], float]:
+    base_url = os.environ.get("OPENAI_BASE_URL", _DEFAULT_BASE_URL)
     api_key = os.environ.get("OPENAI_API_KEY")
     model = os.environ.get("OPENAI_MODEL")
 
     url = base_url.rstrip("/") + "/chat/completions"
     payload = {
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.2,
+        "messages": [{"role": "user", "content": http_pool.TEXT_SLOT}],
+        "temperature": _TEMPERATURE,
     }
     if model:
         payload["model"] = model
+    if stream:
+        payload["stream"] = True
     headers = {
         "Content-Type": "application/json",
     }
     if api_key:
         headers["Authorization"] = f"Bearer {api_key}"
+    timeout = float(os.environ.get("OPENAI_TIMEOUT", _DEFAULT_TIMEOUT))
+    return url, http_pool.json_body(payload, prompt_parts(prompt)), headers, timeout
 
-    req = urllib.request.Request(
-        url, data=json.dumps(payload).encode("utf-8"), headers=headers
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=1020) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as exc:
-        detail = ""
-        try:
-            detail = exc.read().decode("utf-8", "replace").strip()
-        except Exception:
-            detail = ""
+
+def _provider_error(exc: Exception) -> RuntimeError:
+    if isinstance(exc, http_pool.HTTPStatusError):
         if exc.code == 401:
-            raise RuntimeError(
+            return RuntimeError(
                 "HTTP 401 Unauthorized for provider 'codex'. "
                 "This provider uses OPENAI_API_KEY auth. "
                 "If you are logged into Codex CLI, run with --provider codex-cli instead."
-            ) from exc
-        raise RuntimeError(
+            )
+        detail = exc.body.decode("utf-8", "replace").strip()
+        return RuntimeError(
             f"HTTP error from provider 'codex' ({exc.code}): {detail or exc.reason}"
-        ) from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError(f"Network error from provider 'codex': {exc}") from exc
+        )
+    return RuntimeError(f"Network error from provider 'codex': {exc}")
+
+
+def _parse_response(body: bytes) -> str:
+    data = json.loads(body.decode("utf-8"))
     try:
         return data["choices"][0]["message"]["content"]
     except (KeyError, IndexError, TypeError) as exc:
         raise RuntimeError(f"Unexpected LLM response shape: {data}") from exc
 
 
-def run_with_codex(user_text: str, deterministic: bool = False) -> str:
-    req = SkillRequest(messages=[Message(role="user", content=user_text)])
+def _stream_openai_chat(
+    url: str, body: bytes, headers: dict, timeout: float, on_text: Callable[[str], None]
+) -> str:
+    parts = []
+    for _event, data in http_pool.iter_sse(http_pool.post_stream(url, body, headers, timeout=timeout)):
+        if data.strip() == "[DONE]":
+            continue
+        chunk = json.loads(data)
+        try:
+            text = chunk["choices"][0]["delta"].get("content")
+        except (KeyError, IndexError, TypeError, AttributeError):
+            continue
+        if text:
+            parts.append(text)
+            on_text(text)
+    return "".join(parts)
+
+
+def _call_openai_chat(prompt: PromptText, on_text: Optional[Callable[[str], None]] = None) -> str:
+    url, body, headers, timeout = _build_request(prompt, stream=on_text is not None)
+    try:
+        if on_text is not None:
+            return call_with_retry(
+                "codex",
+                prompt,
+                lambda: _stream_openai_chat(url, body, headers, timeout, on_text),
+                retry_network=False,
+            )
+        response = call_with_retry(
+            "codex", prompt, lambda: http_pool.post(url, body, headers, timeout=timeout)
+        )
+    except (http_pool.HTTPStatusError, OSError) as exc:
+        raise _provider_error(exc) from exc
+    return _parse_response(response)
+
+
+async def _acall_openai_chat(prompt: PromptText) -> str:
+    url, body, headers, timeout = _build_request(prompt)
+    try:
+        response = await acall_with_retry(
+            "codex", prompt, lambda: async_http.apost(url, body, headers, timeout=timeout)
+        )
+    except (http_pool.HTTPStatusError, OSError) as exc:
+        raise _provider_error(exc) from exc
+    return _parse_response(response)
+
+
+def _cache_identity() -> Dict[str, object]:
+    return {
+        "model": os.environ.get("OPENAI_MODEL", ""),
+        "temperature": _TEMPERATURE,
+        "endpoint": os.environ.get("OPENAI_BASE_URL", _DEFAULT_BASE_URL),
+    }
+
+
+def complete_with_codex(prompt: PromptText) -> str:
+    """Send a ready-made prompt, bypassing the skill planner and template."""
+
+    return cached_call(prompt, _call_openai_chat, "codex", **_cache_identity())
+
+
+def run_with_codex(
+    user_text: str,
+    deterministic: bool = False,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    skill_plan = plan_text(user_text, deterministic=deterministic)
+    if deterministic:
+        output = execute(skill_plan)
+        if on_text is not None:
+            on_text(output)
+        return output
+
+    prompt = prepare_prompt_parts(skill_plan)
+    return cached_call(
+        prompt,
+        lambda text: _call_openai_chat(text, on_text),
+        "codex",
+        on_hit=on_text,
+        **_cache_identity(),
+    )
+
+
+async def arun_with_codex(user_text: str, deterministic: bool = False) -> str:
+    skill_plan = await asyncio.to_thread(plan_text, user_text, deterministic)
     if deterministic:
-        skill_plan = plan(req, deterministic=True)
-        return execute(skill_plan)
+        return await asyncio.to_thread(execute, skill_plan)
 
-    skill_plan = plan(req, deterministic=False)
-    source_text, _title_hint = load_source(skill_plan)
-    prompt = build_prompt(skill_plan, source_text)
-    return _call_openai_chat(prompt)
+    prompt = await asyncio.to_thread(prepare_prompt_parts, skill_plan)
+    return await acached_call(prompt, _acall_openai_chat, "codex", **_cache_identity())
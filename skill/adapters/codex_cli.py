@@ -1,14 +1,29 @@
+import asyncio
+import atexit
 import os
+import queue
 import shlex
+import shutil
+import signal
 import subprocess
+import sys
 import tempfile
+import threading
+from collections import deque
 from pathlib import Path
+from typing import BinaryIO, Callable, Deque, Dict, List, Optional, Tuple
 
+from skill.core.cache import acached_call, cached_call
 from skill.core.executor import execute
-from skill.core.planner import plan
-from skill.core.prompt import build_prompt
-from skill.core.source import load_source
-from skill.core.types import Message, SkillRequest
+from skill.core.prompt import PromptText, prompt_parts
+from skill.core.skill import plan_text, prepare_prompt_parts
+
+_DEFAULT_WORKERS = 4
+_DEFAULT_TIMEOUT = 600.0
+# Only the end of codex's progress output is kept for error messages.
+_TAIL_BYTES = 16 * 1024
+_READ_CHUNK = 64 * 1024
+_DRAIN_SECONDS = 5.0
 
 
 def _truthy(value: str) -> bool:
@@ -36,42 +51,331 @@ def _build_command() -> list:
     return cmd
 
 
-def _call_codex_cli(prompt: str) -> str:
+def _read_result(returncode: int, stdout: str, stderr: str, output_path: str) -> str:
+    if returncode != 0:
+        detail = (stderr or stdout or "").strip()
+        raise RuntimeError(f"codex exec failed: {detail}")
+
+    output = Path(output_path).read_text(encoding="utf-8")
+    if not output.strip():
+        raise RuntimeError("codex produced empty output")
+    return output
+
+
+def _worker_count() -> int:
+    return max(1, int(os.environ.get("CODEX_CLI_WORKERS", str(_DEFAULT_WORKERS))))
+
+
+def _timeout() -> Optional[float]:
+    value = float(os.environ.get("CODEX_CLI_TIMEOUT", str(_DEFAULT_TIMEOUT)))
+    return value if value > 0 else None
+
+
+class _Tail:
+    """Keep the last ``limit`` bytes of a stream that is read in chunks."""
+
+    def __init__(self, limit: int = _TAIL_BYTES) -> None:
+        self._limit = limit
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+        self._echo = _truthy(os.environ.get("CODEX_CLI_VERBOSE", ""))
+
+    def feed(self, chunk: bytes, echo: bool = False) -> None:
+        if echo and self._echo:
+            sys.stderr.write(chunk.decode("utf-8", "replace"))
+            sys.stderr.flush()
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        while self._size - len(self._chunks[0]) >= self._limit:
+            self._size -= len(self._chunks.popleft())
+
+    def text(self) -> str:
+        data = b"".join(self._chunks)[-self._limit:]
+        return data.decode("utf-8", "replace")
+
+
+class _Slot:
+    def __init__(self, pool: "_WorkerPool", output_path: str) -> None:
+        self.pool = pool
+        self.output_path = output_path
+
+    def reset(self) -> None:
+        # Truncate rather than recreate, so a run that writes nothing can
+        # never return the previous job's message.
+        with open(self.output_path, "w", encoding="utf-8"):
+            pass
+
+
+class _WorkerPool:
+    """Bound concurrent ``codex exec`` runs, each with its own reusable output file.
+
+    ``codex exec`` handles one prompt per process, so a worker is a slot: a
+    concurrency permit plus a scratch file in a private (0700) directory,
+    on tmpfs when ``/dev/shm`` is available.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        parent = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+        self.directory = tempfile.mkdtemp(prefix="bs-codex-cli-", dir=parent)
+        atexit.register(shutil.rmtree, self.directory, True)
+        self._lock = threading.Lock()
+        self._free: Deque[_Slot] = deque(
+            _Slot(self, os.path.join(self.directory, f"slot-{idx}.txt")) for idx in range(size)
+        )
+        # Callables that hand a released slot to a waiter, oldest first; each
+        # returns False if its waiter can no longer take it.
+        self._waiters: Deque[Callable[[_Slot], bool]] = deque()
+
+    def acquire(self) -> _Slot:
+        handoff: "queue.SimpleQueue[_Slot]" = queue.SimpleQueue()
+
+        def deliver(slot: _Slot) -> bool:
+            handoff.put(slot)
+            return True
+
+        with self._lock:
+            if self._free:
+                return self._free.popleft()
+            self._waiters.append(deliver)
+        return handoff.get()
+
+    async def aacquire(self) -> _Slot:
+        # Async callers wait on a future of their own loop rather than in an
+        # executor thread, so queued runs do not starve to_thread work.
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[_Slot]" = loop.create_future()
+
+        def deliver(slot: _Slot) -> bool:
+            try:
+                loop.call_soon_threadsafe(self._hand_over, future, slot)
+            except RuntimeError:  # the waiter's loop is closed
+                return False
+            return True
+
+        with self._lock:
+            if self._free:
+                return self._free.popleft()
+            self._waiters.append(deliver)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if deliver in self._waiters:
+                    self._waiters.remove(deliver)
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            raise
+
+    def _hand_over(self, future: "asyncio.Future[_Slot]", slot: _Slot) -> None:
+        if future.done():
+            self.release(slot)
+        else:
+            future.set_result(slot)
+
+    def release(self, slot: _Slot) -> None:
+        with self._lock:
+            while self._waiters:
+                if self._waiters.popleft()(slot):
+                    return
+            self._free.append(slot)
+
+
+_pool: Optional[_WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _WorkerPool:
+    global _pool
+    size = _worker_count()
+    with _pool_lock:
+        # Jobs hold a reference to their own pool, so a resized pool can
+        # simply replace the old one.
+        if _pool is None or _pool.size != size:
+            _pool = _WorkerPool(size)
+        return _pool
+
+
+def _kill(pid: int, kill: Callable[[], None]) -> None:
+    # codex runs in its own session; kill the whole group so helpers it
+    # spawned cannot keep the pipes open.
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            kill()
+    except OSError:
+        pass
+
+
+def _timeout_error(timeout: Optional[float], stderr: _Tail) -> RuntimeError:
+    detail = stderr.text().strip()
+    return RuntimeError(f"codex exec timed out after {timeout:g}s" + (f": {detail}" if detail else ""))
+
+
+def _pump(stream: BinaryIO, tail: _Tail, echo: bool) -> None:
+    with stream:
+        for chunk in iter(lambda: stream.read1(_READ_CHUNK), b""):
+            tail.feed(chunk, echo)
+
+
+def _feed(stream: BinaryIO, data: bytes) -> None:
+    try:
+        with stream:
+            stream.write(data)
+    except (BrokenPipeError, ValueError):
+        # codex exited (or was killed) before reading all of the prompt.
+        pass
+
+
+def _run_codex(cmd: List[str], data: bytes, timeout: Optional[float]) -> Tuple[int, str, str]:
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    stdout, stderr = _Tail(), _Tail()
+    threads = [
+        threading.Thread(target=_feed, args=(proc.stdin, data), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stdout, stdout, False), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, stderr, True), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill(proc.pid, proc.kill)
+        proc.wait()
+        for thread in threads:
+            thread.join(_DRAIN_SECONDS)
+        raise _timeout_error(timeout, stderr) from None
+    except BaseException:
+        _kill(proc.pid, proc.kill)
+        proc.wait()
+        raise
+    for thread in threads:
+        thread.join(_DRAIN_SECONDS)
+    return returncode, stdout.text(), stderr.text()
+
+
+async def _apump(stream: asyncio.StreamReader, tail: _Tail, echo: bool) -> None:
+    while True:
+        chunk = await stream.read(_READ_CHUNK)
+        if not chunk:
+            return
+        tail.feed(chunk, echo)
+
+
+async def _afeed(stream: asyncio.StreamWriter, data: bytes) -> None:
+    try:
+        stream.write(data)
+        await stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        stream.close()
+
+
+async def _arun_codex(cmd: List[str], data: bytes, timeout: Optional[float]) -> Tuple[int, str, str]:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    stdout, stderr = _Tail(), _Tail()
+    tasks = [
+        asyncio.ensure_future(_afeed(proc.stdin, data)),
+        asyncio.ensure_future(_apump(proc.stdout, stdout, False)),
+        asyncio.ensure_future(_apump(proc.stderr, stderr, True)),
+    ]
+    try:
+        try:
+            returncode = await asyncio.wait_for(proc.wait(), timeout)
+        except asyncio.TimeoutError:
+            _kill(proc.pid, proc.kill)
+            await proc.wait()
+            raise _timeout_error(timeout, stderr) from None
+        except BaseException:
+            _kill(proc.pid, proc.kill)
+            await proc.wait()
+            raise
+        await asyncio.wait(tasks, timeout=_DRAIN_SECONDS)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return returncode, stdout.text(), stderr.text()
+
+
+def _call_codex_cli(prompt: PromptText) -> str:
     cmd = _build_command()
-    tmp_path = None
+    data = "".join(prompt_parts(prompt)).encode("utf-8")
+    pool = _get_pool()
+    slot = pool.acquire()
     try:
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp_path = tmp.name
-
-        run = subprocess.run(
-            cmd + ["--output-last-message", tmp_path, "-"],
-            input=prompt,
-            text=True,
-            capture_output=True,
+        slot.reset()
+        returncode, stdout, stderr = _run_codex(
+            cmd + ["--output-last-message", slot.output_path, "-"], data, _timeout()
         )
-        if run.returncode != 0:
-            detail = (run.stderr or run.stdout or "").strip()
-            raise RuntimeError(f"codex exec failed: {detail}")
-
-        output = Path(tmp_path).read_text(encoding="utf-8")
-        if not output.strip():
-            raise RuntimeError("codex produced empty output")
-        return output
+        return _read_result(returncode, stdout, stderr, slot.output_path)
     finally:
-        if tmp_path:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+        pool.release(slot)
+
+
+async def _acall_codex_cli(prompt: PromptText) -> str:
+    cmd = _build_command()
+    data = "".join(prompt_parts(prompt)).encode("utf-8")
+    pool = _get_pool()
+    slot = await pool.aacquire()
+    try:
+        slot.reset()
+        returncode, stdout, stderr = await _arun_codex(
+            cmd + ["--output-last-message", slot.output_path, "-"], data, _timeout()
+        )
+        return _read_result(returncode, stdout, stderr, slot.output_path)
+    finally:
+        pool.release(slot)
+
+
+def _cache_identity() -> Dict[str, object]:
+    return {
+        "model": os.environ.get("CODEX_CLI_MODEL", ""),
+        "endpoint": shlex.join(_build_command()),
+    }
+
+
+def complete_with_codex_cli(prompt: PromptText) -> str:
+    """Send a ready-made prompt, bypassing the skill planner and template."""
+
+    return cached_call(prompt, _call_codex_cli, "codex-cli", **_cache_identity())
+
+
+def run_with_codex_cli(
+    user_text: str,
+    deterministic: bool = False,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    # codex exec only reports its final message, so streaming callers get the
+    # whole output in a single chunk.
+    skill_plan = plan_text(user_text, deterministic=deterministic)
+    if deterministic:
+        output = execute(skill_plan)
+    else:
+        prompt = prepare_prompt_parts(skill_plan)
+        output = cached_call(prompt, _call_codex_cli, "codex-cli", **_cache_identity())
+    if on_text is not None:
+        on_text(output)
+    return output
 
 
-def run_with_codex_cli(user_text: str, deterministic: bool = False) -> str:
-    req = SkillRequest(messages=[Message(role="user", content=user_text)])
+async def arun_with_codex_cli(user_text: str, deterministic: bool = False) -> str:
+    skill_plan = await asyncio.to_thread(plan_text, user_text, deterministic)
     if deterministic:
-        skill_plan = plan(req, deterministic=True)
-        return execute(skill_plan)
+        return await asyncio.to_thread(execute, skill_plan)
 
-    skill_plan = plan(req, deterministic=False)
-    source_text, _title_hint = load_source(skill_plan)
-    prompt = build_prompt(skill_plan, source_text)
-    return _call_codex_cli(prompt)
+    prompt = await asyncio.to_thread(prepare_prompt_parts, skill_plan)
+    return await acached_call(prompt, _acall_codex_cli, "codex-cli", **_cache_identity())
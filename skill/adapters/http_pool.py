@@ -0,0 +1,282 @@
+import contextlib
+import http.client
+import json
+import os
+import ssl
+import threading
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+_DEFAULT_POOL_SIZE = 8
+_DEFAULT_TIMEOUT = 120.0
+# Errors that mean a reused keep-alive connection was closed by the server
+# before it saw our request; the request is safe to send again once.
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, code: int, reason: str, body: bytes, headers: Mapping[str, str]):
+        super().__init__(f"HTTP Error {code}: {reason}")
+        self.code = code
+        self.reason = reason
+        self.body = body
+        self.headers = {name.lower(): value for name, value in headers.items()}
+
+
+def pool_size() -> int:
+    value = os.environ.get("BLOCKSCAPE_HTTP_POOL_SIZE")
+    return max(1, int(value)) if value else _DEFAULT_POOL_SIZE
+
+
+class ConnectionPool:
+    """Keep-alive connections to a single origin, shared across threads.
+
+    At most ``size`` connections are open at once; callers block until one is
+    free. Idle connections are reused most-recently-released first.
+    """
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        port: int,
+        size: int = _DEFAULT_POOL_SIZE,
+        proxy: Optional[str] = None,
+    ) -> None:
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self._proxy = urllib.parse.urlsplit(proxy) if proxy else None
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[http.client.HTTPConnection] = []
+        self._ssl_context = ssl.create_default_context() if scheme == "https" else None
+        self.connections_opened = 0
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        if self._proxy is not None:
+            proxy_port = self._proxy.port or (443 if self._proxy.scheme == "https" else 80)
+            if self.scheme == "https":
+                conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                    self._proxy.hostname, proxy_port, timeout=timeout, context=self._ssl_context
+                )
+                conn.set_tunnel(self.host, self.port)
+                return conn
+            return http.client.HTTPConnection(self._proxy.hostname, proxy_port, timeout=timeout)
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _target(self, path: str) -> str:
+        # Plain-HTTP proxies expect the absolute URL in the request line.
+        if self._proxy is not None and self.scheme == "http":
+            return f"http://{self.host}:{self.port}{path}"
+        return path
+
+    def _checkout(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._new_connection(timeout), False
+
+    def _release(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        if response.isclosed() and not response.will_close:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            conn.close()
+
+    @contextlib.contextmanager
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = _DEFAULT_TIMEOUT,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """Send a request and yield the response.
+
+        The connection goes back to the pool when the body was fully read
+        inside the ``with`` block and the server allows keep-alive.
+        """
+
+        self._slots.acquire()
+        conn: Optional[http.client.HTTPConnection] = None
+        response: Optional[http.client.HTTPResponse] = None
+        try:
+            while response is None:
+                conn, reused = self._checkout(timeout)
+                try:
+                    conn.request(method, self._target(path), body=body, headers=dict(headers or {}))
+                    response = conn.getresponse()
+                except _STALE_ERRORS:
+                    conn.close()
+                    conn = None
+                    if not reused:
+                        raise
+                except BaseException:
+                    conn.close()
+                    conn = None
+                    raise
+            try:
+                yield response
+            except BaseException:
+                conn.close()
+                conn = None
+                raise
+        finally:
+            if conn is not None and response is not None:
+                self._release(conn, response)
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools: Dict[Tuple[str, str, int], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def split_url(url: str) -> Tuple[str, str, int, str]:
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in {"http", "https"} or not parts.hostname:
+        raise ValueError(f"Unsupported URL: {url}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return parts.scheme, parts.hostname, port, path
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[str]:
+    proxies = urllib.request.getproxies()
+    proxy = proxies.get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    return proxy
+
+
+def get_pool(url: str) -> ConnectionPool:
+    """Return the shared pool for the origin of ``url``."""
+
+    scheme, host, port, _path = split_url(url)
+    key = (scheme, host, port)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(scheme, host, port, size=pool_size(), proxy=_proxy_for(scheme, host))
+            _pools[key] = pool
+        return pool
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Placeholder for the prompt inside a payload passed to ``json_body``.
+TEXT_SLOT = "\x00prompt\x00"
+
+
+def json_body(payload: Any, parts: Sequence[str]) -> bytes:
+    """Encode ``payload`` as JSON with ``TEXT_SLOT`` replaced by the concatenation of ``parts``.
+
+    Each part is escaped on its own, so a large prompt is never joined into
+    one string before encoding. The result equals ``json.dumps`` of the
+    payload with the joined text in place.
+    """
+
+    slot = json.dumps(TEXT_SLOT)
+    head, tail = json.dumps(payload).split(slot, 1)
+    chunks = [head.encode("ascii"), b'"']
+    chunks.extend(json.dumps(part)[1:-1].encode("ascii") for part in parts)
+    chunks.append(b'"')
+    chunks.append(tail.encode("ascii"))
+    return b"".join(chunks)
+
+
+def post(
+    url: str,
+    body: bytes,
+    headers: Mapping[str, str],
+    timeout: float = _DEFAULT_TIMEOUT,
+) -> bytes:
+    """POST ``body`` to ``url`` over a pooled connection and return the response body.
+
+    Raises ``HTTPStatusError`` for 4xx/5xx responses and ``OSError`` for
+    network failures.
+    """
+
+    _scheme, _host, _port, path = split_url(url)
+    try:
+        with get_pool(url).request("POST", path, body=body, headers=headers, timeout=timeout) as resp:
+            status, reason, data, resp_headers = resp.status, resp.reason, resp.read(), resp.headers
+    except http.client.HTTPException as exc:
+        raise ConnectionError(f"{type(exc).__name__}: {exc}") from exc
+    if status >= 400:
+        raise HTTPStatusError(status, reason, data, resp_headers)
+    return data
+
+
+def post_stream(
+    url: str,
+    body: bytes,
+    headers: Mapping[str, str],
+    timeout: float = _DEFAULT_TIMEOUT,
+) -> Iterator[bytes]:
+    """POST ``body`` to ``url`` and yield response lines as they arrive.
+
+    Errors are reported like ``post``. The connection is only returned to the
+    pool when the stream is consumed to the end.
+    """
+
+    _scheme, _host, _port, path = split_url(url)
+    try:
+        with get_pool(url).request("POST", path, body=body, headers=headers, timeout=timeout) as resp:
+            if resp.status >= 400:
+                raise HTTPStatusError(resp.status, resp.reason, resp.read(), resp.headers)
+            for line in resp:
+                yield line
+    except http.client.HTTPException as exc:
+        raise ConnectionError(f"{type(exc).__name__}: {exc}") from exc
+
+
+def iter_sse(lines: Iterable[bytes]) -> Iterator[Tuple[str, str]]:
+    """Parse server-sent events into ``(event, data)`` pairs."""
+
+    event = "message"
+    data: List[str] = []
+    for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+    if data:
+        yield event, "\n".join(data)
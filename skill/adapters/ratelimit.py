@@ -0,0 +1,211 @@
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from skill.adapters.http_pool import HTTPStatusError
+from skill.core.prompt import PromptText, prompt_parts
+from skill.core.trace import span
+
+T = TypeVar("T")
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504, 529}
+# Statuses meaning "slow down" rather than a transient fault.
+THROTTLE_STATUSES = {429, 503, 529}
+_DEFAULT_MAX_RETRIES = 4
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 60.0
+# Adaptive throttling: each rate-limit response halves the effective rate
+# (down to this floor) and each success recovers a little of it.
+_MIN_RATE_FACTOR = 0.1
+_RECOVERY_STEP = 0.05
+
+
+def estimate_tokens(text: PromptText) -> int:
+    return max(1, sum(len(part) for part in prompt_parts(text)) // 4)
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute; callers reserve units and wait off any debt."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, factor: float, now: float) -> float:
+        rate = self.per_minute / 60.0 * factor
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * rate)
+        self._updated = now
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / rate
+
+
+class ProviderLimiter:
+    """Request and token budgets for one provider, shared by every caller in the process."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self.factor = 1.0
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve capacity for one request and return how long to wait before sending it."""
+
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, self.factor, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, self.factor, now))
+            return wait
+
+    def penalize(self, delay: float, throttled: bool = True) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            if throttled:
+                self.factor = max(_MIN_RATE_FACTOR, self.factor / 2)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.factor = min(1.0, self.factor + _RECOVERY_STEP)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_number(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Return the limiter for ``provider``, configured from ``BLOCKSCAPE_<PROVIDER>_RPM`` / ``_TPM``."""
+
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            prefix = "BLOCKSCAPE_" + provider.upper().replace("-", "_")
+            limiter = ProviderLimiter(_env_number(prefix + "_RPM"), _env_number(prefix + "_TPM"))
+            _limiters[provider] = limiter
+        return limiter
+
+
+def reset_limiters() -> None:
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Delay before retry ``attempt`` (0-based): ``Retry-After`` if given, else full-jitter backoff."""
+
+    hinted = parse_retry_after(retry_after)
+    if hinted is not None:
+        return min(hinted, _BACKOFF_CAP)
+    return random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt))
+
+
+def _max_retries() -> int:
+    value = os.environ.get("BLOCKSCAPE_MAX_RETRIES")
+    return max(0, int(value)) if value else _DEFAULT_MAX_RETRIES
+
+
+def _retry_after(exc: Exception, attempt: int, max_retries: int, retry_network: bool) -> Optional[float]:
+    if attempt >= max_retries:
+        return None
+    if isinstance(exc, HTTPStatusError):
+        if exc.code not in RETRY_STATUSES:
+            return None
+        return retry_delay(attempt, exc.headers.get("retry-after"))
+    if retry_network and isinstance(exc, ConnectionError):
+        return retry_delay(attempt)
+    return None
+
+
+def _is_throttle(exc: Exception) -> bool:
+    return isinstance(exc, HTTPStatusError) and exc.code in THROTTLE_STATUSES
+
+
+def call_with_retry(
+    provider: str,
+    prompt: PromptText,
+    send: Callable[[], T],
+    retry_network: bool = True,
+) -> T:
+    """Run ``send`` within the provider's rate limits, retrying throttling and transient errors.
+
+    Pass ``retry_network=False`` when ``send`` may already have produced
+    output (streaming), so a dropped connection is not replayed.
+    """
+
+    limiter = get_limiter(provider)
+    tokens = estimate_tokens(prompt)
+    max_retries = _max_retries()
+    attempt = 0
+    while True:
+        wait = limiter.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        with span("provider.request", provider=provider, attempt=attempt, waited_ms=round(wait * 1000, 3)) as trace_span:
+            try:
+                result = send()
+            except (HTTPStatusError, ConnectionError) as exc:
+                delay = _retry_after(exc, attempt, max_retries, retry_network)
+                if delay is None:
+                    raise
+                trace_span.set(retry_in_ms=round(delay * 1000, 3))
+                limiter.penalize(delay, _is_throttle(exc))
+                attempt += 1
+                continue
+        limiter.record_success()
+        return result
+
+
+async def acall_with_retry(provider: str, prompt: PromptText, send: Callable[[], Awaitable[T]]) -> T:
+    """Async counterpart of ``call_with_retry``."""
+
+    limiter = get_limiter(provider)
+    tokens = estimate_tokens(prompt)
+    max_retries = _max_retries()
+    attempt = 0
+    while True:
+        wait = limiter.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        with span("provider.request", provider=provider, attempt=attempt, waited_ms=round(wait * 1000, 3)) as trace_span:
+            try:
+                result = await send()
+            except (HTTPStatusError, ConnectionError) as exc:
+                delay = _retry_after(exc, attempt, max_retries, retry_network=True)
+                if delay is None:
+                    raise
+                trace_span.set(retry_in_ms=round(delay * 1000, 3))
+                limiter.penalize(delay, _is_throttle(exc))
+                attempt += 1
+                continue
+        limiter.record_success()
+        return result
@@ -0,0 +1,70 @@
+import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Set
+
+from skill.providers import available_providers, run_provider
+
+
+def _run_request(request: Dict[str, object], provider: str, deterministic: bool) -> Dict[str, object]:
+    request_id = request.get("id")
+    try:
+        text = request.get("text")
+        if not isinstance(text, str):
+            raise ValueError("request must include a 'text' string")
+        chosen = request.get("provider", provider)
+        if chosen not in available_providers():
+            raise ValueError(f"unknown provider: {chosen}")
+        output = run_provider(
+            chosen,
+            text,
+            deterministic=bool(request.get("deterministic", deterministic)),
+        )
+    except Exception as exc:
+        return {"id": request_id, "error": str(exc)}
+    return {"id": request_id, "output": output}
+
+
+def run_batch(
+    lines: Iterable[str],
+    write: Callable[[str], None],
+    provider: str,
+    deterministic: bool = False,
+    concurrency: int = 4,
+) -> int:
+    """Run JSONL requests from ``lines`` and ``write`` one JSON result per line.
+
+    Each request is ``{"id": ..., "text": ...}`` and may override
+    ``provider`` and ``deterministic``. Results are written in completion
+    order; at most ``concurrency`` requests run at once and input is read no
+    further ahead than that. Returns the number of failed requests.
+    """
+
+    failures = 0
+    write_lock = threading.Lock()
+
+    def emit(result: Dict[str, object]) -> None:
+        nonlocal failures
+        with write_lock:
+            if "error" in result:
+                failures += 1
+            write(json.dumps(result, ensure_ascii=True) + "\n")
+
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as exc:
+                emit({"id": None, "line": line_no, "error": f"invalid request: {exc}"})
+                continue
+            future = executor.submit(_run_request, request, provider, deterministic)
+            future.add_done_callback(lambda done: emit(done.result()))
+            pending.add(future)
+            if len(pending) >= concurrency:
+                _done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    return failures
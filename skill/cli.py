@@ -1,35 +1,117 @@
 #!/usr/bin/env python3
+import os
 import sys
 import argparse
-from skill.adapters.claude import run_with_claude
-from skill.adapters.codex import run_with_codex
-from skill.adapters.codex_cli import run_with_codex_cli
+from typing import Optional
+
+from skill.core import trace
+from skill.core.trace import span
+from skill.providers import PROVIDERS, available_providers, run_provider
+
+
+def _stream(provider: str, text: str, deterministic: bool, output: Optional[str]) -> None:
+    tmp_path = f"{output}.tmp" if output else None
+    handle = open(tmp_path, "w", encoding="utf-8") if tmp_path else sys.stdout
+
+    def emit(chunk: str) -> None:
+        handle.write(chunk)
+        handle.flush()
+
+    try:
+        out = run_provider(provider, text, deterministic, on_text=emit)
+        if not out.endswith("\n"):
+            emit("\n")
+    except BaseException:
+        if tmp_path:
+            handle.close()
+            os.unlink(tmp_path)
+        raise
+    if tmp_path:
+        handle.close()
+        os.replace(tmp_path, output)
+
+
+def _batch(args) -> int:
+    from skill.batch import run_batch
+
+    handle = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    def write(line: str) -> None:
+        handle.write(line)
+        handle.flush()
+
+    try:
+        failures = run_batch(
+            sys.stdin,
+            write,
+            args.provider,
+            deterministic=args.deterministic,
+            concurrency=args.concurrency,
+        )
+    finally:
+        if args.output:
+            handle.close()
+    return 1 if failures else 0
+
+
+def main(argv: Optional[list] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        from skill.server import main as serve
+
+        return serve(argv[1:])
 
-def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--provider", choices=["claude", "codex", "codex-cli"], required=True)
+    p.add_argument(
+        "--provider",
+        required=True,
+        help=f"One of {', '.join(PROVIDERS)}, or an installed provider plugin",
+    )
     p.add_argument("--output", help="Write output to a file instead of stdout")
     p.add_argument("--deterministic", action="store_true", help="Use deterministic output without calling an LLM")
-    args = p.parse_args()
+    p.add_argument("--stream", action="store_true", help="Write output incrementally as the provider produces it")
+    p.add_argument("--batch", action="store_true", help="Read JSONL requests from stdin and write one JSONL result per request")
+    p.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent requests in --batch mode")
+    p.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Append per-stage timing spans as JSON lines to PATH ('-' for stderr); overrides BLOCKSCAPE_TRACE",
+    )
+    args = p.parse_args(argv)
+    if args.concurrency < 1:
+        p.error("--concurrency must be >= 1")
+    if args.provider not in PROVIDERS and args.provider not in available_providers():
+        choices = ", ".join(available_providers())
+        p.error(f"argument --provider: invalid choice: '{args.provider}' (choose from {choices})")
+    if args.trace:
+        trace.configure(args.trace)
+
+    with span("cli", provider=args.provider, deterministic=args.deterministic):
+        if args.batch:
+            return _batch(args)
+        return _run(args)
+
+
+def _run(args) -> None:
+    with span("stdin.read") as trace_span:
+        text = sys.stdin.read()
+        trace_span.set(chars=len(text))
 
-    text = sys.stdin.read()
-    print("DEBUG: read stdin", file=sys.stderr, flush=True)
+    if args.stream:
+        _stream(args.provider, text, args.deterministic, args.output)
+        return
 
-    if args.provider == "claude":
-        out = run_with_claude(text, deterministic=args.deterministic)
-    elif args.provider == "codex-cli":
-        out = run_with_codex_cli(text, deterministic=args.deterministic)
-    else:
-        out = run_with_codex(text, deterministic=args.deterministic)
+    out = run_provider(args.provider, text, args.deterministic)
 
     if not out.endswith("\n"):
         out += "\n"
 
-    if args.output:
-        with open(args.output, "w", encoding="utf-8") as handle:
-            handle.write(out)
-    else:
-        sys.stdout.write(out)
+    with span("write", chars=len(out), path=args.output):
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                handle.write(out)
+        else:
+            sys.stdout.write(out)
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+import bisect
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has",
+    "have", "in", "into", "is", "it", "its", "of", "on", "or", "that", "the", "their",
+    "they", "this", "to", "was", "were", "will", "with", "you", "your",
+}
+
+_HEADING_RE = re.compile(r"^\s*(#{1,6})\s+(.+?)\s*$")
+_BULLET_RE = re.compile(r"\s*[-*+]\s+(.+)")
+_HEADING_PREFIX_RE = re.compile(r"^\s*#+\s+")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9]{2,}")
+
+
+@dataclass
+class Section:
+    """A heading and the lines it owns, up to the next heading of the same or higher rank."""
+
+    line: int
+    level: int
+    title: str
+    end: int
+    parent: Optional[int] = None
+    children: List[int] = field(default_factory=list)
+
+
+@dataclass
+class DocumentAnalysis:
+    """Everything the deterministic executor needs from a markdown document.
+
+    ``headings`` holds ``(line, level, title)`` and ``bullets`` holds
+    ``(line, text)``, both in document order.
+    """
+
+    line_count: int = 0
+    headings: List[Tuple[int, int, str]] = field(default_factory=list)
+    bullets: List[Tuple[int, str]] = field(default_factory=list)
+    keyword_counts: Counter = field(default_factory=Counter)
+    first_paragraph: str = ""
+    title: Optional[str] = None
+    _sections: Optional[List[Section]] = field(default=None, repr=False, compare=False)
+
+    def keywords(self, limit: int = 24) -> List[str]:
+        if not self.keyword_counts:
+            return []
+        ranked = sorted(self.keyword_counts.items(), key=lambda item: (-item[1], item[0]))
+        return [word for word, _ in ranked[:limit]]
+
+    def sections(self) -> List[Section]:
+        """Return the heading tree, one ``Section`` per heading in document order.
+
+        Built in a single stack-based pass; ``parent`` and ``children`` are
+        indices into the returned list.
+        """
+
+        if self._sections is not None:
+            return self._sections
+        sections: List[Section] = []
+        stack: List[int] = []
+        for line_no, level, title in self.headings:
+            while stack and sections[stack[-1]].level >= level:
+                sections[stack.pop()].end = line_no
+            parent = stack[-1] if stack else None
+            sections.append(Section(line_no, level, title, self.line_count, parent))
+            if parent is not None:
+                sections[parent].children.append(len(sections) - 1)
+            stack.append(len(sections) - 1)
+        self._sections = sections
+        return sections
+
+    def bullets_between(self, start: int, end: int) -> List[str]:
+        """Bullet texts on lines strictly between ``start`` and ``end``."""
+
+        lo = bisect.bisect_right(self.bullets, (start, "\uffff"))
+        hi = bisect.bisect_left(self.bullets, (end, ""))
+        return [text for _, text in self.bullets[lo:hi]]
+
+    def category_level(self) -> Optional[int]:
+        counts = Counter(level for _, level, _ in self.headings)
+        if counts.get(1, 0) >= 3:
+            return 1
+        if counts.get(1, 0) == 1 and counts.get(2, 0) >= 3:
+            return 2
+        if counts.get(2, 0) >= 3:
+            return 2
+        if counts.get(3, 0) >= 3:
+            return 3
+        return None
+
+    def outline(self) -> List[Tuple[str, List[str]]]:
+        category_level = self.category_level()
+        if category_level is None:
+            return []
+
+        sections = self.sections()
+        categories: List[Tuple[str, List[str]]] = []
+        for section in sections:
+            if section.level != category_level:
+                continue
+            items = [
+                sections[child].title
+                for child in section.children
+                if sections[child].level == category_level + 1
+            ]
+            if len(items) < 2:
+                items.extend(self.bullets_between(section.line, section.end))
+            categories.append((section.title, items))
+        return categories
+
+
+def analyze(text: str) -> DocumentAnalysis:
+    """Scan ``text`` once, collecting headings, bullets, keywords, title and first paragraph."""
+
+    result = DocumentAnalysis()
+    counts = result.keyword_counts
+    first_nonempty: Optional[str] = None
+    paragraph: List[str] = []
+    paragraph_done = False
+
+    line_count = 0
+    for idx, line in enumerate(text.splitlines()):
+        line_count = idx + 1
+
+        for word in _WORD_RE.findall(line):
+            lowered = word.lower()
+            if lowered not in _STOPWORDS:
+                counts[lowered] += 1
+
+        match = _HEADING_RE.match(line)
+        if match:
+            level = len(match.group(1))
+            title = match.group(2).strip()
+            result.headings.append((idx, level, title))
+            if level == 1 and result.title is None:
+                result.title = title
+        else:
+            bullet = _BULLET_RE.match(line)
+            if bullet:
+                result.bullets.append((idx, bullet.group(1).strip()))
+
+        stripped = line.strip()
+        if first_nonempty is None and stripped:
+            first_nonempty = stripped[:80]
+
+        if paragraph_done:
+            continue
+        if not stripped:
+            # A whitespace-only line ends the current paragraph.
+            if paragraph:
+                paragraph_done = True
+            continue
+        cleaned = _HEADING_PREFIX_RE.sub("", line).strip()
+        if cleaned:
+            paragraph.append(cleaned)
+
+    result.line_count = line_count
+    result.first_paragraph = " ".join(" ".join(paragraph).split())
+    if result.title is None:
+        result.title = first_nonempty
+    return result
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from .prompt import PromptText, prompt_parts
+from .trace import span
+
+_DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def cache_key(
+    prompt: PromptText,
+    provider: str,
+    model: str = "",
+    temperature: Optional[float] = None,
+    endpoint: str = "",
+) -> str:
+    digest = hashlib.sha256()
+    for part in (provider, endpoint, model, repr(temperature)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    # Hashing the parts in turn gives the same key as the joined prompt.
+    for part in prompt_parts(prompt):
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed store of provider outputs with size-bounded LRU eviction."""
+
+    def __init__(self, directory: str, max_bytes: int = _DEFAULT_MAX_BYTES) -> None:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self.path = os.path.join(directory, "results.sqlite3")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM results ORDER BY last_used ASC")
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[ResultCache] = None
+_configured = False
+_cache_lock = threading.Lock()
+
+
+def _replace_cache(directory: Optional[str], max_bytes: Optional[int]) -> Optional[ResultCache]:
+    global _cache, _configured
+    if _cache is not None:
+        _cache.close()
+    _cache = ResultCache(directory, max_bytes or _DEFAULT_MAX_BYTES) if directory else None
+    _configured = True
+    return _cache
+
+
+def configure_cache(directory: Optional[str], max_bytes: Optional[int] = None) -> Optional[ResultCache]:
+    with _cache_lock:
+        return _replace_cache(directory, max_bytes)
+
+
+def get_cache() -> Optional[ResultCache]:
+    """Return the process-wide cache, configured from the environment on first use."""
+
+    with _cache_lock:
+        if not _configured:
+            directory = os.environ.get("BLOCKSCAPE_CACHE_DIR")
+            max_bytes = os.environ.get("BLOCKSCAPE_CACHE_MAX_BYTES")
+            _replace_cache(directory, int(max_bytes) if max_bytes else None)
+        return _cache
+
+
+def _prompt_stats(prompt: PromptText) -> Dict[str, int]:
+    parts = prompt_parts(prompt)
+    chars = sum(len(part) for part in parts)
+    return {
+        "prompt_bytes": sum(len(part.encode("utf-8")) for part in parts),
+        "prompt_tokens_est": max(1, chars // 4),
+    }
+
+
+def _response_stats(output: str) -> Dict[str, int]:
+    return {
+        "response_bytes": len(output.encode("utf-8")),
+        "response_tokens_est": max(1, len(output) // 4),
+    }
+
+
+def cached_call(
+    prompt: PromptText,
+    call: Callable[[PromptText], str],
+    provider: str,
+    model: str = "",
+    temperature: Optional[float] = None,
+    endpoint: str = "",
+    on_hit: Optional[Callable[[str], None]] = None,
+) -> str:
+    with span("provider.call", provider=provider, model=model) as trace_span:
+        if trace_span:
+            trace_span.set(**_prompt_stats(prompt))
+        cache = get_cache()
+        if cache is None:
+            output = call(prompt)
+        else:
+            key = cache_key(prompt, provider, model, temperature, endpoint)
+            hit = cache.get(key)
+            trace_span.set(cache="miss" if hit is None else "hit")
+            if hit is not None:
+                if on_hit is not None:
+                    on_hit(hit)
+                output = hit
+            else:
+                output = call(prompt)
+                cache.put(key, output)
+        if trace_span:
+            trace_span.set(**_response_stats(output))
+        return output
+
+
+async def acached_call(
+    prompt: PromptText,
+    call: Callable[[PromptText], Awaitable[str]],
+    provider: str,
+    model: str = "",
+    temperature: Optional[float] = None,
+    endpoint: str = "",
+) -> str:
+    with span("provider.call", provider=provider, model=model) as trace_span:
+        if trace_span:
+            trace_span.set(**_prompt_stats(prompt))
+        cache = get_cache()
+        if cache is None:
+            output = await call(prompt)
+        else:
+            key = cache_key(prompt, provider, model, temperature, endpoint)
+            hit = await asyncio.to_thread(cache.get, key)
+            trace_span.set(cache="miss" if hit is None else "hit")
+            if hit is not None:
+                output = hit
+            else:
+                output = await call(prompt)
+                await asyncio.to_thread(cache.put, key, output)
+        if trace_span:
+            trace_span.set(**_response_stats(output))
+        return output
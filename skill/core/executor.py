@@ -1,18 +1,14 @@
+import copy
 import json
 import re
 import unicodedata
-from collections import Counter
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 
+from .analysis import DocumentAnalysis, analyze
 from .source import load_source
+from .trace import span
 from .types import SkillPlan
 
-_STOPWORDS = {
-    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has",
-    "have", "in", "into", "is", "it", "its", "of", "on", "or", "that", "the", "their",
-    "they", "this", "to", "was", "were", "will", "with", "you", "your",
-}
-
 _DEFAULT_CATEGORIES = [
     ("user-value", "User Value"),
     ("experience", "Experience"),
@@ -51,83 +47,6 @@ def _unique_id(base: str, used: set) -> str:
     return unique
 
 
-def _extract_keywords(text: str, limit: int = 24) -> List[str]:
-    words = re.findall(r"[A-Za-z][A-Za-z0-9]{2,}", text)
-    counts = Counter()
-    for word in words:
-        lowered = word.lower()
-        if lowered in _STOPWORDS:
-            continue
-        counts[lowered] += 1
-    if not counts:
-        return []
-    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
-    return [word for word, _ in ranked[:limit]]
-
-
-def _first_paragraph(text: str) -> str:
-    for chunk in re.split(r"\n\s*\n", text):
-        lines = []
-        for line in chunk.splitlines():
-            line = re.sub(r"^\s*#+\s+", "", line).strip()
-            if line:
-                lines.append(line)
-        if lines:
-            cleaned = " ".join(" ".join(lines).split())
-            if cleaned:
-                return cleaned
-    return ""
-
-
-def _extract_outline(lines: List[str]) -> List[Tuple[str, List[str]]]:
-    heading_re = re.compile(r"^\s*(#{1,6})\s+(.+?)\s*$")
-    headings: List[Tuple[int, int, str]] = []
-    for idx, line in enumerate(lines):
-        match = heading_re.match(line)
-        if match:
-            level = len(match.group(1))
-            title = match.group(2).strip()
-            headings.append((idx, level, title))
-    if not headings:
-        return []
-
-    counts = Counter(level for _, level, _ in headings)
-    category_level: Optional[int] = None
-    if counts.get(1, 0) >= 3:
-        category_level = 1
-    elif counts.get(1, 0) == 1 and counts.get(2, 0) >= 3:
-        category_level = 2
-    elif counts.get(2, 0) >= 3:
-        category_level = 2
-    elif counts.get(3, 0) >= 3:
-        category_level = 3
-
-    if category_level is None:
-        return []
-
-    categories: List[Tuple[str, List[str]]] = []
-    for idx, (line_no, level, title) in enumerate(headings):
-        if level != category_level:
-            continue
-        next_line = len(lines)
-        for other_line, other_level, _ in headings:
-            if other_line > line_no and other_level <= category_level:
-                next_line = other_line
-                break
-        items = [
-            txt
-            for (ln, lvl, txt) in headings
-            if line_no < ln < next_line and lvl == category_level + 1
-        ]
-        if len(items) < 2:
-            for line in lines[line_no + 1 : next_line]:
-                match = re.match(r"\s*[-*+]\s+(.+)", line)
-                if match:
-                    items.append(match.group(1).strip())
-        categories.append((title, items))
-    return categories
-
-
 def _fallback_abstract(title_hint: str) -> str:
     lowered = title_hint.lower()
     return (
@@ -207,11 +126,12 @@ def _assign_deps(categories: List[Dict[str, object]]) -> None:
             item["deps"] = list(next_ids)
 
 
-def _generate_model(text: str, title_hint: str, want_wardley: bool) -> Dict[str, object]:
-    lines = text.splitlines()
-    outline = _extract_outline(lines)
-    keywords = _extract_keywords(text)
-    summary = _first_paragraph(text)
+def _generate_model(
+    analysis: DocumentAnalysis, title_hint: str, want_wardley: bool
+) -> Dict[str, object]:
+    outline = analysis.outline()
+    keywords = analysis.keywords()
+    summary = analysis.first_paragraph
     if not summary or len(summary) < 40:
         summary = _fallback_abstract(title_hint)
 
@@ -271,16 +191,28 @@ def _generate_model(text: str, title_hint: str, want_wardley: bool) -> Dict[str,
 
 
 def execute(plan: SkillPlan) -> str:
-    source_text, title_hint = load_source(plan)
+    with span("load_source", path=plan.file_path) as trace_span:
+        source_text, title_hint = load_source(plan, detect_title=False)
+        trace_span.set(chars=len(source_text))
+    with span("execute", series=plan.want_series, wardley=plan.want_wardley):
+        return _render(plan, source_text, title_hint)
+
+
+def _render(plan: SkillPlan, source_text: str, title_hint: str) -> str:
+    analysis = analyze(source_text)
+    if analysis.title:
+        title_hint = analysis.title
 
     if plan.want_series:
+        # Every stage shares one analysis and one base model; only ids,
+        # titles and abstracts differ. Stages after the first are future state.
+        base = _generate_model(analysis, title_hint, plan.want_wardley)
         models: List[Dict[str, object]] = []
-        for label in ["Current", "Target"]:
-            model = _generate_model(source_text, title_hint, plan.want_wardley)
-            model_id = f"{model['id']}-{_slugify(label)}"
-            model["id"] = model_id
+        for idx, label in enumerate(plan.series_labels):
+            model = copy.deepcopy(base)
+            model["id"] = f"{base['id']}-{_slugify(label)}"
             model["title"] = f"{title_hint} Blockscape ({label})"
-            if label == "Target":
+            if idx > 0:
                 model["abstract"] = (
                     model["abstract"].rstrip(".")
                     + " with a focus on future-state enablement."
@@ -288,5 +220,5 @@ def execute(plan: SkillPlan) -> str:
             models.append(model)
         return json.dumps(models, indent=2, ensure_ascii=True)
 
-    model = _generate_model(source_text, title_hint, plan.want_wardley)
+    model = _generate_model(analysis, title_hint, plan.want_wardley)
     return json.dumps(model, indent=2, ensure_ascii=True)
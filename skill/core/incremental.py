@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .analysis import analyze
+
+# Above this share of changed sections a full regeneration is cheaper than a
+# patch prompt carrying the existing map.
+FULL_REGENERATION_RATIO = 0.5
+_SIDECAR_VERSION = 1
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*\n(.*?)\n\s*```\s*$", re.DOTALL)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split markdown into ``(key, body)`` pairs, one per heading plus the preamble.
+
+    Keys are heading paths such as ``"Platform > Runtime"``; repeated paths get
+    a ``#n`` suffix so every key is unique. A body runs from its heading to the
+    next heading of any level, so nested sections are hashed independently.
+    """
+
+    lines = text.splitlines()
+    analysis = analyze(text)
+    sections = analysis.sections()
+    starts = [section.line for section in sections] + [len(lines)]
+
+    result: List[Tuple[str, str]] = []
+    if not sections or starts[0] > 0:
+        result.append(("", "\n".join(lines[: starts[0]])))
+
+    paths: List[str] = []
+    used: Dict[str, int] = {}
+    for idx, section in enumerate(sections):
+        parent = section.parent
+        path = section.title if parent is None else f"{paths[parent]} > {section.title}"
+        paths.append(path)
+        count = used.get(path, 0) + 1
+        used[path] = count
+        key = path if count == 1 else f"{path} #{count}"
+        result.append((key, "\n".join(lines[starts[idx] : starts[idx + 1]])))
+    return result
+
+
+def section_hashes(sections: List[Tuple[str, str]]) -> Dict[str, str]:
+    return {
+        key: hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+        for key, body in sections
+    }
+
+
+def diff_sections(old: Dict[str, str], new: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """Return ``(changed, removed)`` section keys; added sections count as changed."""
+
+    changed = [key for key, digest in new.items() if old.get(key) != digest]
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+def sidecar_path(output_path: str) -> str:
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, f".{name}.sections.json")
+
+
+def load_sidecar(output_path: str) -> Optional[Dict[str, object]]:
+    try:
+        with open(sidecar_path(output_path), "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != _SIDECAR_VERSION:
+        return None
+    if not isinstance(data.get("sections"), dict) or not isinstance(data.get("output"), str):
+        return None
+    return data
+
+
+def save_sidecar(output_path: str, hashes: Dict[str, str], output: str) -> None:
+    path = sidecar_path(output_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump({"version": _SIDECAR_VERSION, "sections": hashes, "output": output}, handle)
+    os.replace(tmp_path, path)
+
+
+def needs_full_regeneration(changed: List[str], removed: List[str], total: int) -> bool:
+    return len(changed) + len(removed) > FULL_REGENERATION_RATIO * max(1, total)
+
+
+def build_update_prompt(
+    previous_output: str,
+    sections: List[Tuple[str, str]],
+    changed: List[str],
+    removed: List[str],
+) -> str:
+    bodies = dict(sections)
+    parts = [
+        "You maintain a Blockscape map (JSON) generated from a markdown document.",
+        "Some sections of the document changed. Update only the categories those "
+        "sections affect, keeping existing ids stable and following the same schema.",
+        "Reply with a single JSON object and nothing else:",
+        '{"categories": [<updated or new category objects, each with "id">], '
+        '"removed": [<ids of categories to drop>], "abstract": <new abstract or null>}',
+        "",
+        "Existing map:",
+        previous_output.strip(),
+    ]
+    for key in changed:
+        parts += ["", f"Changed section: {key or '(preamble)'}", bodies[key]]
+    if removed:
+        parts += ["", "Removed sections:"] + [f"- {key or '(preamble)'}" for key in removed]
+    return "\n".join(parts)
+
+
+def merge_update(previous_output: str, response: str) -> str:
+    """Apply a provider's category patch to the previous map and return the new JSON.
+
+    Raises ``ValueError`` when either side is not in the expected shape, so
+    callers can fall back to a full regeneration.
+    """
+
+    model = json.loads(previous_output)
+    if not isinstance(model, dict) or not isinstance(model.get("categories"), list):
+        raise ValueError("previous output is not a single Blockscape map")
+    fenced = _FENCE_RE.match(response)
+    patch = json.loads(fenced.group(1) if fenced else response)
+    if not isinstance(patch, dict):
+        raise ValueError("update response is not a JSON object")
+
+    updates = patch.get("categories") or []
+    removed = set(patch.get("removed") or [])
+    if not isinstance(updates, list) or not all(
+        isinstance(category, dict) and "id" in category for category in updates
+    ):
+        raise ValueError("update response categories must be objects with an 'id'")
+
+    by_id = {category["id"]: category for category in updates}
+    merged = []
+    for category in model["categories"]:
+        category_id = category.get("id")
+        if category_id in removed:
+            continue
+        merged.append(by_id.pop(category_id, category))
+    merged.extend(category for category in updates if category["id"] in by_id)
+    model["categories"] = merged
+    if isinstance(patch.get("abstract"), str) and patch["abstract"].strip():
+        model["abstract"] = patch["abstract"].strip()
+    return json.dumps(model, indent=2, ensure_ascii=True)
@@ -1,45 +1,125 @@
 import os
 import re
-from typing import Optional
+import unicodedata
+from typing import Dict, List, Optional, Set
 
-from .types import SkillPlan, SkillRequest
+from .types import DEFAULT_SERIES_LABELS, SkillPlan, SkillRequest
 
 _PATH_HINT_RE = re.compile(r"\b(?:file|path)\s*:\s*(.+)", re.IGNORECASE)
+# "series (Current/Next/Target)", "stages: Now, Next, Later"
+# Stage names are only read once a series was asked for: preferably as a
+# parenthesised list right after "series", else from a "stages: A, B" or
+# "stages (A/B)" phrase; prose such as "the stages evolve, grow" is ignored.
+_LABEL_LIST = r"([A-Za-z][\w-]*(?:\s*(?:/|,|->)\s*[A-Za-z][\w-]*)+)"
+_SERIES_LIST_RE = re.compile(r"\bseries\s*\(\s*" + _LABEL_LIST + r"\s*\)", re.IGNORECASE)
+_STAGES_LIST_RE = re.compile(r"\bstages?\s*[:(]\s*" + _LABEL_LIST, re.IGNORECASE)
+
+# Inline documents can hold tens of thousands of tokens; only path-shaped
+# ones are probed, and at most this many directories are listed per call.
+_MAX_DIRECTORY_PROBES = 32
+_MAX_PATH_LENGTH = 1024
+_PATH_SHAPE_RE = re.compile(r"[/\\]|\.[A-Za-z0-9]{1,10}$")
+_NOT_PATH_RE = re.compile(r'[<>|"*?\x00-\x1f]')
 
 def _clean_token(token: str) -> str:
     return token.strip().strip("\"'()[]<>.,;:")
 
+def _looks_like_path(candidate: str) -> bool:
+    return (
+        0 < len(candidate) <= _MAX_PATH_LENGTH
+        and _PATH_SHAPE_RE.search(candidate) is not None
+        and _NOT_PATH_RE.search(candidate) is None
+    )
+
+class _PathProber:
+    """``os.path.isfile`` for many candidates with a bounded number of syscalls.
+
+    ``isfile`` stats a single candidate directly. ``scan`` is for the bulk
+    token search: each directory is listed once per call and a candidate is
+    only stat-ed when its name appears in the listing. Names are compared
+    case-folded and NFC-normalised, so the listing never rules out a file
+    that a case-insensitive or normalising filesystem would find. Repeated
+    candidates are not re-checked.
+    """
+
+    def __init__(self, max_probes: int = _MAX_DIRECTORY_PROBES) -> None:
+        self._listings: Dict[str, Optional[Set[str]]] = {}
+        self._checked: Set[str] = set()
+        self._remaining = max_probes
+
+    def isfile(self, candidate: str) -> bool:
+        if not candidate or candidate in self._checked:
+            return False
+        self._checked.add(candidate)
+        return os.path.isfile(candidate)
+
+    def scan(self, candidate: str) -> bool:
+        if not candidate or candidate in self._checked:
+            return False
+        self._checked.add(candidate)
+        directory, name = os.path.split(candidate)
+        if not name:
+            return False
+        directory = directory or "."
+        if directory in self._listings:
+            names = self._listings[directory]
+        elif self._remaining <= 0:
+            return False
+        else:
+            self._remaining -= 1
+            try:
+                names = {_fold_name(entry) for entry in os.listdir(directory)}
+            except OSError:
+                names = None
+            self._listings[directory] = names
+        return names is not None and _fold_name(name) in names and os.path.isfile(candidate)
+
+
+def _fold_name(name: str) -> str:
+    return unicodedata.normalize("NFC", name).casefold()
+
 def _find_existing_path(text: str) -> Optional[str]:
+    prober = _PathProber()
     candidate = text.strip()
     if "\n" not in candidate and " " not in candidate:
         candidate = _clean_token(candidate)
-        if candidate and os.path.isfile(candidate):
+        if candidate and prober.isfile(candidate):
             return candidate
 
     for line in text.splitlines():
         match = _PATH_HINT_RE.search(line)
         if match:
             candidate = _clean_token(match.group(1))
-            if candidate and os.path.isfile(candidate):
+            if candidate and prober.isfile(candidate):
                 return candidate
 
     for match in re.finditer(r"\(([^)]+)\)", text):
         candidate = _clean_token(match.group(1))
-        if candidate and os.path.isfile(candidate):
+        if _looks_like_path(candidate) and prober.scan(candidate):
             return candidate
 
-    for token in re.split(r"\s+", text):
-        token = token.lstrip("@")
-        candidate = _clean_token(token)
-        if candidate and os.path.isfile(candidate):
+    for match in re.finditer(r"\S+", text):
+        candidate = _clean_token(match.group(0).lstrip("@"))
+        if _looks_like_path(candidate) and prober.scan(candidate):
             return candidate
 
     return None
 
+def _series_labels(text: str) -> List[str]:
+    match = _SERIES_LIST_RE.search(text) or _STAGES_LIST_RE.search(text)
+    if not match:
+        return list(DEFAULT_SERIES_LABELS)
+    labels: List[str] = []
+    for label in re.split(r"\s*(?:/|,|->)\s*", match.group(1)):
+        if label and label.lower() not in (seen.lower() for seen in labels):
+            labels.append(label)
+    return labels if len(labels) >= 2 else list(DEFAULT_SERIES_LABELS)
+
 def plan(req: SkillRequest, deterministic: bool = False) -> SkillPlan:
     user_text = req.messages[-1].content.strip()
     file_path = _find_existing_path(user_text)
     want_series = bool(re.search(r"\bseries\b", user_text, re.IGNORECASE))
+    series_labels = _series_labels(user_text) if want_series else list(DEFAULT_SERIES_LABELS)
     want_wardley = bool(re.search(r"\bwardley\b", user_text, re.IGNORECASE))
     return SkillPlan(
         user_text=user_text,
@@ -47,4 +127,5 @@ def plan(req: SkillRequest, deterministic: bool = False) -> SkillPlan:
         want_series=want_series,
         want_wardley=want_wardley,
         deterministic=deterministic,
+        series_labels=series_labels,
     )
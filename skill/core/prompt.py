@@ -1,29 +1,73 @@
 import os
+import threading
 from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
 
 from .types import SkillPlan
 
 _DEFAULT_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompt.md"
+_REFERENCE_MARKER = "[referenced file]"
 
+# A prompt as one string or as parts to concatenate (see ``build_prompt_parts``).
+PromptText = Union[str, Sequence[str]]
 
-def _load_template() -> str:
+# path -> (mtime_ns, size, template split on the reference marker)
+_template_cache: Dict[Path, Tuple[int, int, List[str]]] = {}
+_template_lock = threading.Lock()
+
+
+def prompt_parts(prompt: PromptText) -> Sequence[str]:
+    return (prompt,) if isinstance(prompt, str) else prompt
+
+
+def _template_path() -> Path:
     override = os.environ.get("BLOCKSCAPE_PROMPT_PATH")
-    path = Path(override) if override else _DEFAULT_PROMPT_PATH
-    if path.exists():
-        return path.read_text(encoding="utf-8")
-    raise FileNotFoundError(f"Prompt template not found: {path}")
+    return Path(override) if override else _DEFAULT_PROMPT_PATH
 
 
-def build_prompt(plan: SkillPlan, source_text: str) -> str:
-    instruction = _load_template()
+def _template_segments() -> List[str]:
+    """Return the template pre-split on ``[referenced file]``, re-read only when it changes."""
+
+    path = _template_path()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt template not found: {path}") from None
+    with _template_lock:
+        cached = _template_cache.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+    segments = path.read_text(encoding="utf-8").split(_REFERENCE_MARKER)
+    with _template_lock:
+        _template_cache[path] = (stat.st_mtime_ns, stat.st_size, segments)
+    return segments
+
+
+def build_prompt_parts(plan: SkillPlan, source_text: str) -> List[str]:
+    """Return the prompt as a list of strings whose concatenation is ``build_prompt``.
+
+    The source text is included as-is rather than copied into one large
+    string, so callers can hash or encode the parts one by one.
+    """
+
+    segments = _template_segments()
     if plan.file_path:
         referenced = plan.file_path
     else:
         referenced = "the referenced content"
 
-    instruction = instruction.replace("[referenced file]", referenced)
+    parts: List[str] = [segments[0]]
+    for segment in segments[1:]:
+        parts.append(referenced)
+        parts.append(segment)
     user_request = plan.user_text.strip()
     if user_request:
         if plan.file_path or len(user_request) < 800:
-            instruction += "\n\nUser request:\n" + user_request
-    return instruction + "\n\nReferenced file content:\n" + source_text
+            parts.append("\n\nUser request:\n" + user_request)
+    parts.append("\n\nReferenced file content:\n")
+    parts.append(source_text)
+    return parts
+
+
+def build_prompt(plan: SkillPlan, source_text: str) -> str:
+    return "".join(build_prompt_parts(plan, source_text))
@@ -1,8 +1,29 @@
+from typing import List
+
 from .planner import plan
 from .executor import execute
-from .types import SkillRequest, SkillResult
+from .prompt import build_prompt_parts
+from .source import load_source
+from .trace import span
+from .types import Message, SkillPlan, SkillRequest, SkillResult
 
 def run_skill(req: SkillRequest, deterministic: bool = False) -> SkillResult:
     steps = plan(req, deterministic=deterministic)
     result = execute(steps)
     return SkillResult(output=result)
+
+
+def plan_text(user_text: str, deterministic: bool = False) -> SkillPlan:
+    with span("plan", chars=len(user_text)):
+        req = SkillRequest(messages=[Message(role="user", content=user_text)])
+        return plan(req, deterministic=deterministic)
+
+
+def prepare_prompt_parts(skill_plan: SkillPlan) -> List[str]:
+    with span("load_source", path=skill_plan.file_path) as trace_span:
+        source_text, _title_hint = load_source(skill_plan)
+        trace_span.set(chars=len(source_text))
+    with span("build_prompt") as trace_span:
+        parts = build_prompt_parts(skill_plan, source_text)
+        trace_span.set(chars=sum(len(part) for part in parts))
+    return parts
@@ -1,31 +1,184 @@
 import os
 import re
-from typing import Optional, Tuple
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
 
 from .types import SkillPlan
 
+# Rough size of a token, used to turn BLOCKSCAPE_MAX_SOURCE_TOKENS into a budget.
+_BYTES_PER_TOKEN = 4
+_TRUNCATION_MARKER = "[...]"
 
-def _title_from_content(lines) -> Optional[str]:
-    for line in lines:
-        match = re.match(r"^\s*#\s+(.+)", line)
-        if match:
-            return match.group(1).strip()
-    for line in lines:
-        cleaned = line.strip()
-        if cleaned:
-            return cleaned[:80]
+_TITLE_RE = re.compile(r"^[^\S\n]*#[^\S\n]+(.+)", re.MULTILINE)
+_FIRST_TEXT_RE = re.compile(r"\S[^\n]*")
+_HEADING_LINE_RE = re.compile(r"^[ \t]*#{1,6}[ \t]+\S[^\n]*", re.MULTILINE)
+_HEADING_LINE_BYTES_RE = re.compile(rb"^[ \t]*#{1,6}[ \t]+\S[^\n]*", re.MULTILINE)
+
+
+def _title_from_content(text: str) -> Optional[str]:
+    match = _TITLE_RE.search(text)
+    if match:
+        return match.group(1).strip()
+    match = _FIRST_TEXT_RE.search(text)
+    if match:
+        return match.group(0).strip()[:80]
     return None
 
 
-def load_source(plan: SkillPlan) -> Tuple[str, str]:
+def source_budget() -> Optional[int]:
+    """Return the source size limit from ``BLOCKSCAPE_MAX_SOURCE_BYTES`` / ``_TOKENS``, if any."""
+
+    limits = []
+    max_bytes = os.environ.get("BLOCKSCAPE_MAX_SOURCE_BYTES")
+    if max_bytes:
+        limits.append(int(max_bytes))
+    max_tokens = os.environ.get("BLOCKSCAPE_MAX_SOURCE_TOKENS")
+    if max_tokens:
+        limits.append(int(max_tokens) * _BYTES_PER_TOKEN)
+    return max(0, min(limits)) if limits else None
+
+
+def _truncated_slices(
+    size: int,
+    headings: List[Tuple[int, int]],
+    budget: int,
+    last_newline: Callable[[int, int], int],
+) -> List[Tuple[int, int]]:
+    """Pick ``(start, end)`` ranges of a ``size``-long source that fit ``budget``.
+
+    ``headings`` are the ``(start, end)`` offsets of heading lines, without
+    their newline. Every heading line is kept while they fit; the remaining
+    budget is shared between the bodies in proportion to their size, each cut
+    back to a whole line with ``last_newline(start, end)`` (the offset of the
+    last newline in that range, or -1). ``(-1, -1)`` marks where body text was
+    dropped.
+    """
+
+    heading_size = sum(end - start + 1 for start, end in headings)
+
+    if heading_size >= budget:
+        kept: List[Tuple[int, int]] = []
+        used = 0
+        for start, end in headings:
+            used += end - start + 1
+            if used > budget:
+                break
+            kept.append((start, min(end + 1, size)))
+        return kept
+
+    bodies = []
+    previous = 0
+    for start, end in headings:
+        bodies.append((previous, start))
+        previous = min(end + 1, size)
+    bodies.append((previous, size))
+    body_size = sum(end - start for start, end in bodies) or 1
+    remaining = budget - heading_size
+
+    slices: List[Tuple[int, int]] = []
+    for idx, (start, end) in enumerate(bodies):
+        share = remaining * (end - start) // body_size
+        if share >= end - start:
+            if end > start:
+                slices.append((start, end))
+        else:
+            cut = last_newline(start, start + share)
+            if cut >= start:
+                slices.append((start, cut + 1))
+            slices.append((-1, -1))
+        if idx < len(headings):
+            heading_start, heading_end = headings[idx]
+            slices.append((heading_start, min(heading_end + 1, size)))
+    return slices
+
+
+def truncate_source(text: str, budget: int) -> str:
+    """Shrink ``text`` to roughly ``budget`` characters, keeping its heading outline."""
+
+    if len(text) <= budget:
+        return text
+    headings = [(match.start(), match.end()) for match in _HEADING_LINE_RE.finditer(text)]
+    slices = _truncated_slices(len(text), headings, budget, lambda start, end: text.rfind("\n", start, end))
+    return _join_slices(slices, lambda start, end: text[start:end])
+
+
+def _join_slices(slices: List[Tuple[int, int]], read: Callable[[int, int], Union[str, bytes]]) -> str:
+    parts = []
+    for start, end in slices:
+        if start < 0:
+            parts.append(_TRUNCATION_MARKER + "\n")
+            continue
+        chunk = read(start, end)
+        parts.append(chunk if isinstance(chunk, str) else chunk.decode("utf-8", "ignore"))
+    return "".join(parts)
+
+
+def _normalize_newlines(text: str) -> str:
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _heading_offsets(handle: BinaryIO) -> List[Tuple[int, int]]:
+    headings = []
+    offset = 0
+    for line in handle:
+        match = _HEADING_LINE_BYTES_RE.match(line)
+        if match:
+            headings.append((offset + match.start(), offset + match.end()))
+        offset += len(line)
+    return headings
+
+
+def read_source_file(path: str, budget: Optional[int] = None) -> str:
+    """Read ``path`` as text, truncating it to ``budget`` bytes if given.
+
+    Over budget, the file is streamed once to find its headings and then
+    only the kept ranges are read, so a huge file with a small budget never
+    becomes one large Python string.
+    """
+
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if budget is None or size <= budget:
+            text = handle.read().decode("utf-8", "ignore")
+        else:
+            headings = _heading_offsets(handle)
+
+            def read(start: int, end: int) -> bytes:
+                handle.seek(start)
+                return handle.read(end - start)
+
+            def last_newline(start: int, end: int) -> int:
+                cut = read(start, end).rfind(b"\n")
+                return start + cut if cut >= 0 else -1
+
+            text = _join_slices(_truncated_slices(size, headings, budget, last_newline), read)
+    return _normalize_newlines(text)
+
+
+def load_source(
+    plan: SkillPlan,
+    detect_title: bool = True,
+    max_bytes: Optional[int] = None,
+) -> Tuple[str, str]:
+    """Return ``(source_text, title_hint)`` for ``plan``.
+
+    ``max_bytes`` (default: ``source_budget()``) bounds the source size; over
+    budget, headings are kept and body text is dropped proportionally.
+    """
+
+    budget = max_bytes if max_bytes is not None else source_budget()
     source_text = plan.user_text
     title_hint = "Blockscape Map"
     if plan.file_path:
-        with open(plan.file_path, "r", encoding="utf-8", errors="ignore") as handle:
-            source_text = handle.read()
+        source_text = read_source_file(plan.file_path, budget)
         base = os.path.splitext(os.path.basename(plan.file_path))[0]
         title_hint = base.replace("_", " ").replace("-", " ").title()
-    detected_title = _title_from_content(source_text.splitlines())
+    elif budget is not None:
+        source_text = truncate_source(source_text, budget)
+    if not detect_title:
+        return source_text, title_hint
+    detected_title = _title_from_content(source_text)
     if detected_title:
         title_hint = detected_title
     return source_text, title_hint
@@ -0,0 +1,134 @@
+"""Timing spans for the skill pipeline, exported as JSON lines.
+
+Tracing is off unless ``BLOCKSCAPE_TRACE`` names a file (``-`` for stderr) or
+``configure`` is called. While off, ``span`` returns a shared no-op object,
+so instrumented code pays one function call and a global lookup::
+
+    with span("load_source", path=path) as s:
+        text = read()
+        if s:  # only compute expensive attributes when tracing
+            s.set(bytes=len(text.encode("utf-8")))
+
+Each finished span is written as one JSON object with ``trace``, ``span``,
+``parent``, ``name``, ``start`` (epoch seconds), ``duration_ms`` and its
+attributes. Nesting follows the current context, so spans opened inside
+another span share its random ``trace`` id; ``span`` ids count up per process.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+_sink: Optional[TextIO] = None
+_owns_sink = False
+_configured = False
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("skill_trace_span", default=None)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+    def __bool__(self) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, name: str, attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_ids)
+        self.parent: Optional[Span] = None
+        self.trace_id = ""
+        self._token: Optional[contextvars.Token] = None
+        self._start = 0.0
+        self._wall = 0.0
+
+    def __bool__(self) -> bool:
+        return True
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self.parent = _current.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else os.urandom(8).hex()
+        self._token = _current.set(self)
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: object) -> None:
+        duration = time.perf_counter() - self._start
+        if self._token is not None:
+            _current.reset(self._token)
+        record: Dict[str, Any] = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "start": round(self._wall, 6),
+            "duration_ms": round(duration * 1000, 3),
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        record.update(self.attrs)
+        _emit(record)
+
+
+def _emit(record: Dict[str, Any]) -> None:
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        if _sink is not None:
+            _sink.write(line)
+            _sink.flush()
+
+
+def configure(path: Optional[str]) -> None:
+    """Send spans to ``path`` (appending; ``-`` is stderr), or disable tracing with ``None``."""
+
+    global _sink, _owns_sink, _configured
+    with _lock:
+        if _owns_sink and _sink is not None:
+            _sink.close()
+        if not path:
+            _sink, _owns_sink = None, False
+        elif path == "-":
+            _sink, _owns_sink = sys.stderr, False
+        else:
+            _sink, _owns_sink = open(path, "a", encoding="utf-8"), True
+        _configured = True
+
+
+def enabled() -> bool:
+    if not _configured:
+        configure(os.environ.get("BLOCKSCAPE_TRACE"))
+    return _sink is not None
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Return a context manager timing ``name``; a no-op when tracing is off."""
+
+    if not _configured:
+        configure(os.environ.get("BLOCKSCAPE_TRACE"))
+    if _sink is None:
+        return _NULL_SPAN
+    return Span(name, attrs)
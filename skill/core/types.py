@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, List, Dict, Optional
 
+DEFAULT_SERIES_LABELS = ["Current", "Target"]
+
 @dataclass
 class Message:
     role: str
@@ -22,6 +24,7 @@ class SkillPlan:
     want_series: bool
     want_wardley: bool
     deterministic: bool
+    series_labels: List[str] = field(default_factory=lambda: list(DEFAULT_SERIES_LABELS))
 
 @dataclass
 class SkillResult:
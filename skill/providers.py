@@ -0,0 +1,112 @@
+"""Provider registry.
+
+Adapters are imported on first use, so a process only pays for the provider
+it calls, and deterministic runs of the built-in providers import none of
+them. Extra providers can be installed as plugins under the
+``bs_skill.providers`` entry-point group; the entry point must resolve to an
+object (typically a module) with ``run(text, deterministic=False,
+on_text=None)`` and, optionally, ``complete(prompt)``. Built-in names win
+over plugins.
+"""
+
+import importlib
+import threading
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+ENTRY_POINT_GROUP = "bs_skill.providers"
+
+# name -> (module, run function, complete function)
+_BUILTIN_PROVIDERS: Dict[str, Tuple[str, str, str]] = {
+    "claude": ("skill.adapters.claude", "run_with_claude", "complete_with_claude"),
+    "codex": ("skill.adapters.codex", "run_with_codex", "complete_with_codex"),
+    "codex-cli": ("skill.adapters.codex_cli", "run_with_codex_cli", "complete_with_codex_cli"),
+}
+
+PROVIDERS = tuple(_BUILTIN_PROVIDERS)
+
+
+class Provider(NamedTuple):
+    run: Callable[..., str]
+    complete: Optional[Callable[..., str]]
+
+
+_lock = threading.Lock()
+_loaded: Dict[str, Provider] = {}
+_plugins: Optional[Dict[str, object]] = None
+
+
+def _plugin_entry_points() -> Dict[str, object]:
+    global _plugins
+    if _plugins is None:
+        from importlib.metadata import entry_points
+
+        found = entry_points()
+        if hasattr(found, "select"):
+            group = found.select(group=ENTRY_POINT_GROUP)
+        else:  # Python < 3.10
+            group = found.get(ENTRY_POINT_GROUP, [])
+        _plugins = {ep.name: ep for ep in group if ep.name not in _BUILTIN_PROVIDERS}
+    return _plugins
+
+
+def available_providers() -> Tuple[str, ...]:
+    """Built-in provider names followed by any installed plugins."""
+
+    return PROVIDERS + tuple(sorted(_plugin_entry_points()))
+
+
+def get_provider(name: str) -> Provider:
+    """Import and return provider ``name``; raise ValueError if it is unknown."""
+
+    provider = _loaded.get(name)
+    if provider is not None:
+        return provider
+    with _lock:
+        provider = _loaded.get(name)
+        if provider is not None:
+            return provider
+        if name in _BUILTIN_PROVIDERS:
+            module_name, run_name, complete_name = _BUILTIN_PROVIDERS[name]
+            module = importlib.import_module(module_name)
+            provider = Provider(getattr(module, run_name), getattr(module, complete_name))
+        else:
+            entry_point = _plugin_entry_points().get(name)
+            if entry_point is None:
+                raise ValueError(f"Unknown provider: {name}")
+            target = entry_point.load()
+            run = getattr(target, "run", None)
+            if not callable(run):
+                raise ValueError(f"Provider plugin '{name}' has no run() function")
+            provider = Provider(run, getattr(target, "complete", None))
+        _loaded[name] = provider
+        return provider
+
+
+def _run_deterministic(text: str, on_text: Optional[Callable[[str], None]]) -> str:
+    from skill.core.executor import execute
+    from skill.core.skill import plan_text
+
+    output = execute(plan_text(text, deterministic=True))
+    if on_text is not None:
+        on_text(output)
+    return output
+
+
+def run_provider(
+    provider: str,
+    text: str,
+    deterministic: bool = False,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    if deterministic and provider in _BUILTIN_PROVIDERS:
+        # Every built-in adapter answers deterministic requests the same way,
+        # without touching the network, so skip importing it.
+        return _run_deterministic(text, on_text)
+    return get_provider(provider).run(text, deterministic=deterministic, on_text=on_text)
+
+
+def complete_prompt(provider: str, prompt: str) -> str:
+    complete = get_provider(provider).complete
+    if complete is None:
+        raise ValueError(f"Provider '{provider}' does not support raw prompt completion")
+    return complete(prompt)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Long-running skill server.
+
+Keeps the interpreter, adapters and template warm and answers JSON requests
+over localhost HTTP or a Unix socket:
+
+- ``POST /run``    ``{"text", "provider"?, "deterministic"?}`` -> ``{"output"}``
+- ``POST /skill``  ``{"text"}`` or ``{"messages": [...]}`` -> ``{"output"}`` via ``run_skill``
+- ``GET /health``  liveness check
+- ``GET /metrics`` request counters, queue depth and latency
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from skill.core.skill import run_skill
+from skill.core.types import Message, SkillRequest
+from skill.providers import available_providers, run_provider
+
+_MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class Overloaded(Exception):
+    pass
+
+
+class RequestGate:
+    """Admit at most ``concurrency`` requests at once and queue up to ``max_queue`` more."""
+
+    def __init__(self, concurrency: int, max_queue: int) -> None:
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.started = time.time()
+
+    def run(self, func, *args):
+        with self._lock:
+            if self.in_flight + self.queued >= self.concurrency + self.max_queue:
+                self.rejected += 1
+                raise Overloaded("request queue is full")
+            self.queued += 1
+        self._slots.acquire()
+        start = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+        ok = False
+        try:
+            result = func(*args)
+            ok = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self.latency_total += elapsed
+                self.latency_max = max(self.latency_max, elapsed)
+            self._slots.release()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "uptime_seconds": round(time.time() - self.started, 3),
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "latency_avg_seconds": round(self.latency_total / finished, 6) if finished else 0.0,
+                "latency_max_seconds": round(self.latency_max, 6),
+            }
+
+
+def _handle_run(body: Dict[str, object], default_provider: str, deterministic: bool) -> str:
+    text = body.get("text")
+    if not isinstance(text, str):
+        raise ValueError("request must include a 'text' string")
+    provider = body.get("provider", default_provider)
+    if provider not in available_providers():
+        raise ValueError(f"unknown provider: {provider}")
+    return run_provider(provider, text, deterministic=bool(body.get("deterministic", deterministic)))
+
+
+def _handle_skill(body: Dict[str, object]) -> str:
+    messages = body.get("messages")
+    if messages is None and isinstance(body.get("text"), str):
+        messages = [{"role": "user", "content": body["text"]}]
+    if not isinstance(messages, list) or not messages:
+        raise ValueError("request must include 'text' or a non-empty 'messages' list")
+    req = SkillRequest(messages=[Message(role=m["role"], content=m["content"]) for m in messages])
+    return run_skill(req, deterministic=True).output
+
+
+class SkillHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "bs-skill"
+
+    def _send_json(self, status: int, payload: Dict[str, object]) -> None:
+        body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.server.gate.snapshot())
+        else:
+            self._send_json(404, {"error": f"unknown path: {self.path}"})
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length header"})
+            return
+        if length > _MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": "request body too large"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as exc:
+            self._send_json(400, {"error": f"invalid request: {exc}"})
+            return
+
+        if self.path == "/run":
+            func, args = _handle_run, (body, self.server.provider, self.server.deterministic)
+        elif self.path == "/skill":
+            func, args = _handle_skill, (body,)
+        else:
+            self._send_json(404, {"error": f"unknown path: {self.path}"})
+            return
+
+        try:
+            output = self.server.gate.run(func, *args)
+        except Overloaded as exc:
+            self._send_json(503, {"error": str(exc)})
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+        except Exception as exc:
+            self._send_json(500, {"error": str(exc)})
+        else:
+            self._send_json(200, {"output": output})
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address.
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _ServerMixin:
+    gate: RequestGate
+    provider: str = "codex"
+    deterministic: bool = False
+    verbose: bool = False
+    daemon_threads = True
+
+
+class SkillHTTPServer(_ServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class SkillUnixServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Unlink a socket left by a previous server; refuse to delete anything else."""
+
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+    os.unlink(socket_path)
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[str] = None,
+    provider: str = "codex",
+    deterministic: bool = False,
+    concurrency: int = 4,
+    max_queue: int = 64,
+    verbose: bool = False,
+):
+    if socket_path:
+        _remove_stale_socket(socket_path)
+        server = SkillUnixServer(socket_path, SkillHandler)
+    else:
+        server = SkillHTTPServer((host, port), SkillHandler)
+    server.gate = RequestGate(concurrency, max_queue)
+    server.provider = provider
+    server.deterministic = deterministic
+    server.verbose = verbose
+    return server
+
+
+def _describe(server) -> str:
+    if isinstance(server, SkillUnixServer):
+        return f"unix:{server.server_address}"
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="skill serve", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--provider", choices=available_providers(), default="codex", help="Default provider for /run")
+    parser.add_argument("--deterministic", action="store_true", help="Default /run requests to deterministic output")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum requests processed at once")
+    parser.add_argument("--max-queue", type=int, default=64, help="Maximum requests waiting for a slot before returning 503")
+    parser.add_argument("--verbose", action="store_true", help="Log requests to stderr")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if args.max_queue < 0:
+        parser.error("--max-queue must be >= 0")
+
+    try:
+        server = make_server(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            provider=args.provider,
+            deterministic=args.deterministic,
+            concurrency=args.concurrency,
+            max_queue=args.max_queue,
+            verbose=args.verbose,
+        )
+    except OSError as exc:
+        print(f"ERROR: cannot listen: {exc}", file=sys.stderr)
+        return 1
+    print(f"Serving on {_describe(server)}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+import json
+
+from skill.core.analysis import analyze
+from skill.core.executor import execute
+from skill.core.planner import plan
+from skill.core.types import Message, SkillRequest
+
+
+def test_analyze_collects_document_structure_in_one_pass():
+    text = "\n".join(
+        [
+            "Intro line about payments",
+            "continues here.",
+            "",
+            "# Payments",
+            "## Checkout",
+            "- Cart",
+            "* Wallets",
+            "## Settlement",
+            "Payments settle nightly.",
+        ]
+    )
+
+    analysis = analyze(text)
+
+    assert analysis.title == "Payments"
+    assert analysis.first_paragraph == "Intro line about payments continues here."
+    assert analysis.headings == [(3, 1, "Payments"), (4, 2, "Checkout"), (7, 2, "Settlement")]
+    assert analysis.bullets == [(5, "Cart"), (6, "Wallets")]
+    assert analysis.keywords(2) == ["payments", "about"]
+    assert analysis.line_count == 9
+
+
+def test_analyze_falls_back_to_first_line_for_title():
+    analysis = analyze("\n\n   plain title text   \nbody")
+    assert analysis.title == "plain title text"
+    assert analysis.outline() == []
+
+
+def test_sections_and_outline_follow_the_heading_tree():
+    text = "\n".join(
+        [
+            "# Platform",
+            "## Runtime",
+            "#### Deep note",
+            "### Scheduler",
+            "### Storage",
+            "## Delivery",
+            "- Build",
+            "- Release",
+            "## Edge",
+            "- Cache",
+        ]
+    )
+
+    analysis = analyze(text)
+    sections = analysis.sections()
+
+    assert [(s.title, s.end, s.parent) for s in sections] == [
+        ("Platform", 10, None),
+        ("Runtime", 5, 0),
+        ("Deep note", 3, 1),
+        ("Scheduler", 4, 1),
+        ("Storage", 5, 1),
+        ("Delivery", 8, 0),
+        ("Edge", 10, 0),
+    ]
+    assert analysis.outline() == [
+        ("Runtime", ["Scheduler", "Storage"]),
+        ("Delivery", ["Build", "Release"]),
+        ("Edge", ["Cache"]),
+    ]
+
+
+def test_outline_scales_to_heading_heavy_documents():
+    lines = []
+    for i in range(5000):
+        lines.append(f"## Category {i}")
+        lines.append(f"- item {i}")
+    outline = analyze("\n".join(lines)).outline()
+
+    assert len(outline) == 5000
+    assert outline[-1] == ("Category 4999", ["item 4999"])
+
+
+def _plan(text):
+    return plan(SkillRequest(messages=[Message(role="user", content=text)]), deterministic=True)
+
+
+def test_series_stages_share_one_model():
+    models = json.loads(execute(_plan("series (Current/Next/Target/Future) for payments")))
+
+    assert [m["title"] for m in models] == [
+        "series (Current/Next/Target/Future) for payments Blockscape (" + label + ")"
+        for label in ("Current", "Next", "Target", "Future")
+    ]
+    assert models[0]["id"].endswith("-current")
+    assert not models[0]["abstract"].endswith("future-state enablement.")
+    assert all(m["abstract"].endswith("future-state enablement.") for m in models[1:])
+    assert all(m["categories"] == models[0]["categories"] for m in models)
+    assert models[1]["categories"] is not models[0]["categories"]
@@ -0,0 +1,24 @@
+import json
+
+from skill.batch import run_batch
+
+
+def test_run_batch_writes_one_result_per_request():
+    lines = [
+        json.dumps({"id": "a", "text": "Generate a blockscape map for tests/fixtures/payments.md"}),
+        "",
+        "not json",
+        json.dumps({"id": "b", "text": "payments", "provider": "nope"}),
+        json.dumps({"id": "c"}),
+    ]
+    written = []
+
+    failures = run_batch(lines, written.append, "codex", deterministic=True, concurrency=2)
+
+    results = {json.dumps(r["id"]): r for r in map(json.loads, written)}
+    assert failures == 3
+    assert len(written) == 4
+    assert json.loads(results['"a"']["output"])["id"] == "payment-processing-platform"
+    assert "unknown provider" in results['"b"']["error"]
+    assert "text" in results['"c"']["error"]
+    assert results["null"]["line"] == 3
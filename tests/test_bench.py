@@ -0,0 +1,40 @@
+import importlib.util
+import json
+from pathlib import Path
+
+
+BENCH_PATH = Path(__file__).resolve().parents[1] / "scripts" / "bench.py"
+SPEC = importlib.util.spec_from_file_location("bench", BENCH_PATH)
+assert SPEC and SPEC.loader
+MODULE = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(MODULE)
+
+
+def test_bench_stores_baseline_and_flags_regressions(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    args = ["--scale", "tiny", "--repeat", "1", "--only", "execute.plain", "--baseline", str(baseline)]
+
+    assert MODULE.main(args + ["--save-baseline"]) == 0
+    stored = json.loads(baseline.read_text())
+    assert sorted(stored["tiny"]) == [
+        "execute.plain.bullets",
+        "execute.plain.flat",
+        "execute.plain.huge",
+        "execute.plain.nested",
+    ]
+
+    # Any slowdown beyond -100% counts, so every benchmark is flagged.
+    assert MODULE.main(args + ["--threshold", "-1"]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_only_the_selected_benchmark_inputs_are_generated(tmp_path):
+    corpus = MODULE.Corpus(tmp_path, MODULE.SCALES["tiny"])
+    benchmarks = {name: prepare for name, prepare, _unit in MODULE.build_benchmarks(corpus)}
+    assert list(tmp_path.iterdir()) == []
+
+    func, units = benchmarks["execute.plain.flat"]()
+    func()
+
+    assert units > 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["flat.md"]
@@ -0,0 +1,49 @@
+from skill.core.cache import ResultCache, cache_key, cached_call, configure_cache
+
+
+def test_cache_key_depends_on_provider_model_and_prompt():
+    base = cache_key("prompt", "codex", model="llama3.2", temperature=0.2)
+    assert base == cache_key("prompt", "codex", model="llama3.2", temperature=0.2)
+    assert base != cache_key("prompt", "claude", model="llama3.2", temperature=0.2)
+    assert base != cache_key("prompt", "codex", model="llama3.1", temperature=0.2)
+    assert base != cache_key("prompt", "codex", model="llama3.2", temperature=0.7)
+    assert base != cache_key("prompt!", "codex", model="llama3.2", temperature=0.2)
+    assert base == cache_key(["pro", "", "mpt"], "codex", model="llama3.2", temperature=0.2)
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    cache.close()
+
+
+def test_cached_call_skips_provider_on_hit(tmp_path):
+    calls = []
+
+    def call(prompt):
+        calls.append(prompt)
+        return "{}"
+
+    cache = configure_cache(str(tmp_path))
+    try:
+        first = cached_call("same prompt", call, "codex", model="m")
+        second = cached_call("same prompt", call, "codex", model="m")
+        cached_call("same prompt", call, "codex", model="other")
+    finally:
+        configure_cache(None)
+
+    assert first == second == "{}"
+    assert len(calls) == 2
+    assert cache.hits == 1
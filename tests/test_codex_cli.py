@@ -0,0 +1,135 @@
+import asyncio
+import os
+import stat
+import time
+
+import pytest
+
+from skill.adapters import codex_cli
+from skill.adapters.codex_cli import arun_with_codex_cli, run_with_codex_cli
+
+FAKE_CODEX = """#!/bin/sh
+out=""
+while [ $# -gt 0 ]; do
+  if [ "$1" = "--output-last-message" ]; then out="$2"; shift; fi
+  shift
+done
+if [ -n "$FAKE_CODEX_NOISE" ]; then head -c 200000 /dev/zero | tr '\\0' x >&2; fi
+if [ -n "$FAKE_CODEX_SLEEP" ]; then sleep "$FAKE_CODEX_SLEEP"; fi
+if [ -n "$FAKE_CODEX_FAIL" ]; then echo "boom" >&2; exit 3; fi
+echo "$out" >> "$FAKE_CODEX_LOG"
+wc -c > "$out"
+"""
+
+
+@pytest.fixture
+def fake_codex(tmp_path, monkeypatch):
+    script = tmp_path / "bin" / "codex"
+    script.parent.mkdir()
+    script.write_text(FAKE_CODEX, encoding="utf-8")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{script.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_CODEX_LOG", str(tmp_path / "calls.log"))
+    monkeypatch.setattr(codex_cli, "_pool", None)
+    doc = tmp_path / "doc.md"
+    doc.write_text("# Doc\n", encoding="utf-8")
+    return f"map for file: {doc}"
+
+
+def test_codex_cli_sync_and_async_agree(fake_codex):
+    async def run_many():
+        return await asyncio.gather(*(arun_with_codex_cli(fake_codex) for _ in range(3)))
+
+    sync_output = run_with_codex_cli(fake_codex)
+    async_outputs = asyncio.run(run_many())
+
+    assert int(sync_output) > 0
+    assert async_outputs == [sync_output] * 3
+
+
+def test_codex_cli_reports_failures(fake_codex, monkeypatch):
+    monkeypatch.setenv("FAKE_CODEX_FAIL", "1")
+
+    with pytest.raises(RuntimeError, match="codex exec failed: boom"):
+        run_with_codex_cli(fake_codex)
+    with pytest.raises(RuntimeError, match="codex exec failed: boom"):
+        asyncio.run(arun_with_codex_cli(fake_codex))
+
+
+def test_codex_cli_reuses_private_scratch_files(fake_codex, tmp_path, monkeypatch):
+    monkeypatch.setenv("CODEX_CLI_WORKERS", "2")
+
+    async def run_many():
+        return await asyncio.gather(*(arun_with_codex_cli(fake_codex) for _ in range(5)))
+
+    for _ in range(3):
+        run_with_codex_cli(fake_codex)
+    asyncio.run(run_many())
+
+    used = set((tmp_path / "calls.log").read_text().split())
+    assert len(used) <= 2
+    directory = os.path.dirname(used.pop())
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_codex_cli_kills_hung_runs(fake_codex, monkeypatch):
+    monkeypatch.setenv("FAKE_CODEX_SLEEP", "30")
+    monkeypatch.setenv("CODEX_CLI_TIMEOUT", "0.5")
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="timed out after 0.5s"):
+        run_with_codex_cli(fake_codex)
+    with pytest.raises(RuntimeError, match="timed out after 0.5s"):
+        asyncio.run(arun_with_codex_cli(fake_codex))
+    assert time.monotonic() - start < 10
+
+
+def test_codex_cli_keeps_only_the_tail_of_diagnostics(fake_codex, monkeypatch):
+    monkeypatch.setenv("FAKE_CODEX_NOISE", "1")
+    monkeypatch.setenv("FAKE_CODEX_FAIL", "1")
+
+    with pytest.raises(RuntimeError) as excinfo:
+        run_with_codex_cli(fake_codex)
+    message = str(excinfo.value)
+    assert message.endswith("boom")
+    assert len(message) <= codex_cli._TAIL_BYTES + 100
+
+
+def test_cancelled_slot_waiters_do_not_leak_slots(monkeypatch):
+    monkeypatch.setenv("CODEX_CLI_WORKERS", "1")
+    monkeypatch.setattr(codex_cli, "_pool", None)
+    pool = codex_cli._get_pool()
+
+    async def scenario():
+        held = await pool.aacquire()
+        waiter = asyncio.ensure_future(pool.aacquire())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        pool.release(held)
+        return await asyncio.wait_for(pool.aacquire(), timeout=5)
+
+    assert asyncio.run(scenario()) is not None
+
+
+def test_async_slot_waiters_do_not_occupy_executor_threads(monkeypatch):
+    monkeypatch.setenv("CODEX_CLI_WORKERS", "1")
+    monkeypatch.setattr(codex_cli, "_pool", None)
+    pool = codex_cli._get_pool()
+
+    async def take_and_release():
+        slot = await pool.aacquire()
+        await asyncio.sleep(0)
+        pool.release(slot)
+
+    async def scenario():
+        held = await pool.aacquire()
+        waiters = [asyncio.ensure_future(take_and_release()) for _ in range(40)]
+        await asyncio.sleep(0.05)
+        assert await asyncio.wait_for(asyncio.to_thread(lambda: 1), timeout=2) == 1
+        pool.release(held)
+        await asyncio.wait_for(asyncio.gather(*waiters), timeout=5)
+
+    asyncio.run(scenario())
+    assert pool.acquire() is not None
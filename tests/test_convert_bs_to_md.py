@@ -1,4 +1,6 @@
 import importlib.util
+import os
+import sys
 from pathlib import Path
 
 
@@ -6,6 +8,8 @@ CONVERT_PATH = Path(__file__).resolve().parents[1] / "scripts" / "convert_bs_to_
 SPEC = importlib.util.spec_from_file_location("convert_bs_to_md", CONVERT_PATH)
 assert SPEC and SPEC.loader
 MODULE = importlib.util.module_from_spec(SPEC)
+# Registered so worker processes can unpickle the conversion function.
+sys.modules[SPEC.name] = MODULE
 SPEC.loader.exec_module(MODULE)
 
 convert_file = MODULE.convert_file
@@ -49,3 +53,43 @@ def test_convert_file_overwrites_when_flag_set(tmp_path):
     convert_file(str(src), overwrite=True)
 
     assert out.read_text(encoding="utf-8").startswith("# Blockscape Map of redo.md")
+
+
+def test_convert_tree_incremental_rewrites_only_stale_outputs(tmp_path):
+    fresh = tmp_path / "fresh.bs"
+    stale = tmp_path / "stale.bs"
+    for src in (fresh, stale):
+        src.write_text("{}", encoding="utf-8")
+    (tmp_path / "fresh-bs.md").write_text("# fresh", encoding="utf-8")
+    (tmp_path / "stale-bs.md").write_text("# stale", encoding="utf-8")
+    old = stale.stat().st_mtime_ns - 10_000_000_000
+    os.utime(tmp_path / "stale-bs.md", ns=(old, old))
+
+    written = convert_tree(str(tmp_path), incremental=True)
+
+    assert written == [str(tmp_path / "stale-bs.md")]
+    assert (tmp_path / "fresh-bs.md").read_text(encoding="utf-8") == "# fresh"
+
+
+def test_convert_tree_with_jobs_matches_serial_output(tmp_path):
+    for idx in range(6):
+        (tmp_path / f"doc{idx}.bs").write_text(f'{{"n": {idx}}}', encoding="utf-8")
+
+    written = convert_tree(str(tmp_path), jobs=3)
+
+    assert sorted(written) == sorted(str(tmp_path / f"doc{idx}-bs.md") for idx in range(6))
+    assert '{"n": 4}' in (tmp_path / "doc4-bs.md").read_text(encoding="utf-8")
+
+
+def test_main_loads_the_template_once(tmp_path, monkeypatch):
+    (tmp_path / "doc.bs").write_text('{"n": 1}', encoding="utf-8")
+    template = tmp_path / "template.md"
+    template.write_text("Custom {mdfilename}\n{json}\n", encoding="utf-8")
+    loads = []
+    real_load_template = MODULE.load_template
+    monkeypatch.setattr(MODULE, "load_template", lambda path=None: loads.append(path) or real_load_template(path))
+    monkeypatch.setattr(sys, "argv", ["convert_bs_to_md.py", str(tmp_path), "--md-template", str(template)])
+
+    assert MODULE.main() == 0
+    assert loads == [str(template)]
+    assert (tmp_path / "doc-bs.md").read_text(encoding="utf-8").startswith("Custom doc.md")
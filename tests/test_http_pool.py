@@ -0,0 +1,201 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from skill.adapters import async_http, http_pool, ratelimit
+from skill.adapters.codex import _call_openai_chat, arun_with_codex, run_with_codex
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    status = 200
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        self.server.requests.append(request)
+        time.sleep(self.server.delay)
+        content = request["messages"][0]["content"]
+        if self.server.throttle_times > 0:
+            self.server.throttle_times -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if request.get("stream"):
+            self._stream(content)
+            return
+        body = json.dumps({"choices": [{"message": {"content": content.upper()}}]}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, content):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [
+            json.dumps({"choices": [{"delta": {"content": ch.upper()}}]}) for ch in content
+        ] + ["[DONE]"]
+        for event in events:
+            data = f"data: {event}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.requests = []
+    srv.status = 200
+    srv.throttle_times = 0
+    srv.delay = 0.0
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    http_pool.close_pools()
+    ratelimit.reset_limiters()
+
+
+def test_post_reuses_keep_alive_connection(server):
+    url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    for word in ["a", "b", "c"]:
+        payload = json.dumps({"messages": [{"role": "user", "content": word}]}).encode()
+        http_pool.post(url, payload, {"Content-Type": "application/json"})
+
+    assert len(server.requests) == 3
+    assert http_pool.get_pool(url).connections_opened == 1
+
+
+def test_codex_adapter_uses_pool_and_maps_http_errors(server, monkeypatch):
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_MODEL", "test-model")
+
+    assert _call_openai_chat("hello") == "HELLO"
+    assert server.requests[0]["model"] == "test-model"
+
+    monkeypatch.setenv("BLOCKSCAPE_MAX_RETRIES", "0")
+    server.status = 500
+    with pytest.raises(RuntimeError, match=r"HTTP error from provider 'codex' \(500\)"):
+        _call_openai_chat("boom")
+
+
+def test_json_body_matches_json_dumps_of_joined_parts():
+    parts = ["intro \u00e9 \"quoted\"\n", "", "\U0001f600 tail\\"]
+    payload = {"model": "m", "messages": [{"role": "user", "content": http_pool.TEXT_SLOT}]}
+
+    expected = dict(payload, messages=[{"role": "user", "content": "".join(parts)}])
+    assert http_pool.json_body(payload, parts) == json.dumps(expected).encode("utf-8")
+
+
+def test_iter_sse_joins_multiline_data_and_skips_comments():
+    lines = [b": keep-alive\n", b"event: delta\n", b"data: a\n", b"data: b\n", b"\n", b"data: c\n"]
+    assert list(http_pool.iter_sse(lines)) == [("delta", "a\nb"), ("message", "c")]
+
+
+def test_codex_adapter_streams_chunks(server, monkeypatch):
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    chunks = []
+
+    output = _call_openai_chat("abc", on_text=chunks.append)
+    _call_openai_chat("again")
+
+    assert chunks == ["A", "B", "C"]
+    assert output == "ABC"
+    assert server.requests[0]["stream"] is True
+    pool_url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    assert http_pool.get_pool(pool_url).connections_opened == 1
+
+
+def test_deterministic_run_delivers_output_through_callback():
+    chunks = []
+    output = run_with_codex(
+        "Generate a blockscape map for the domain of tests/fixtures/payments.md",
+        deterministic=True,
+        on_text=chunks.append,
+    )
+    assert chunks == [output]
+
+
+def test_async_codex_adapter_shares_connections(server, monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("BLOCKSCAPE_HTTP_POOL_SIZE", "3")
+    doc = tmp_path / "doc.md"
+    doc.write_text("# Doc", encoding="utf-8")
+
+    async def main():
+        outputs = await asyncio.gather(
+            *(arun_with_codex(f"map for file: {doc}") for _ in range(12))
+        )
+        url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        return outputs, async_http.get_pool(url).connections_opened
+
+    outputs, opened = asyncio.run(main())
+
+    assert len(server.requests) == 12
+    assert all("REFERENCED FILE CONTENT:\n# DOC" in out for out in outputs)
+    assert opened <= 3
+
+
+def test_async_timeout_excludes_waiting_for_a_pool_slot(server, monkeypatch):
+    monkeypatch.setenv("BLOCKSCAPE_HTTP_POOL_SIZE", "2")
+    server.delay = 0.4
+    url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+
+    async def call(word):
+        payload = json.dumps({"messages": [{"role": "user", "content": word}]}).encode()
+        body = await async_http.apost(url, payload, {"Content-Type": "application/json"}, timeout=1.0)
+        return json.loads(body)["choices"][0]["message"]["content"]
+
+    async def main():
+        return await asyncio.gather(*(call(f"w{i}") for i in range(8)))
+
+    assert asyncio.run(main()) == [f"W{i}" for i in range(8)]
+    assert len(server.requests) == 8
+
+
+def test_async_deterministic_matches_sync():
+    request = "Generate a blockscape map for the domain of tests/fixtures/payments.md"
+    assert asyncio.run(arun_with_codex(request, deterministic=True)) == run_with_codex(
+        request, deterministic=True
+    )
+
+
+def test_throttled_requests_are_retried_after_retry_after(server, monkeypatch):
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    server.throttle_times = 2
+
+    assert _call_openai_chat("retry") == "RETRY"
+    assert len(server.requests) == 3
+    assert ratelimit.get_limiter("codex").factor < 1.0
+
+
+def test_token_bucket_schedules_requests_beyond_budget():
+    limiter = ratelimit.ProviderLimiter(requests_per_minute=60, tokens_per_minute=600)
+
+    waits = [limiter.reserve(100) for _ in range(8)]
+
+    assert waits[:6] == [0.0] * 6
+    assert waits[6] == pytest.approx(10.0, abs=0.1)
+    assert waits[7] == pytest.approx(20.0, abs=0.1)
+
+
+def test_retry_delay_prefers_retry_after_header():
+    assert ratelimit.retry_delay(3, "2") == 2.0
+    assert 0 <= ratelimit.retry_delay(2) <= 4.0
+    assert ratelimit.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
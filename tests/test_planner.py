@@ -0,0 +1,86 @@
+import os
+
+from skill.core import planner
+from skill.core.planner import plan
+from skill.core.types import Message, SkillRequest
+
+
+def _plan(text):
+    return plan(SkillRequest(messages=[Message(role="user", content=text)]), deterministic=True)
+
+
+def test_plan_reads_series_stage_labels():
+    assert _plan("make a series").series_labels == ["Current", "Target"]
+    custom = _plan("series (Current/Next/Target/Future) for payments")
+    assert custom.want_series
+    assert custom.series_labels == ["Current", "Next", "Target", "Future"]
+    assert _plan("a series with stages: Now, Later").series_labels == ["Now", "Later"]
+
+
+def test_stage_phrases_alone_do_not_request_a_series():
+    for text in (
+        "map our release process; stage gates, reviews, sign-offs matter",
+        "# CI\n\nThe pipeline stages: lint, test, deploy.",
+    ):
+        skill_plan = _plan(text)
+        assert not skill_plan.want_series
+        assert skill_plan.series_labels == ["Current", "Target"]
+
+
+def test_stage_lists_need_a_colon_or_parenthesis():
+    skill_plan = _plan("Build a series showing how the stages evolve, grow, and mature")
+    assert skill_plan.want_series
+    assert skill_plan.series_labels == ["Current", "Target"]
+    assert _plan("a series over stages (Seed/Grow)").series_labels == ["Seed", "Grow"]
+
+
+def test_explicit_series_list_wins_over_stage_phrases_in_the_document():
+    skill_plan = _plan("series (Now/Later)\n\nThe pipeline stages: lint, test, deploy.")
+    assert skill_plan.series_labels == ["Now", "Later"]
+
+
+def _count_syscalls(monkeypatch):
+    listed = []
+    stats = []
+    real_listdir = os.listdir
+    real_isfile = os.path.isfile
+    monkeypatch.setattr(planner.os, "listdir", lambda path: listed.append(path) or real_listdir(path))
+    monkeypatch.setattr(planner.os.path, "isfile", lambda path: stats.append(path) or real_isfile(path))
+    return listed, stats
+
+
+def test_plan_finds_path_in_large_inline_text_with_few_syscalls(tmp_path, monkeypatch):
+    target = tmp_path / "docs" / "design.md"
+    target.parent.mkdir()
+    target.write_text("# Design\n")
+    monkeypatch.chdir(tmp_path)
+    listed, stats = _count_syscalls(monkeypatch)
+
+    filler = " ".join(f"word{i} (aside {i}) e.g. notes{i}.txt" for i in range(5000))
+    found = planner._find_existing_path(filler + " see @docs/design.md, thanks")
+
+    assert found == "docs/design.md"
+    assert listed == [".", "docs"]
+    assert stats == ["docs/design.md"]
+
+
+def test_file_hint_is_stat_ed_without_listing_its_directory(tmp_path, monkeypatch):
+    target = tmp_path / "docs" / "design.md"
+    target.parent.mkdir()
+    target.write_text("# Design\n")
+    listed, stats = _count_syscalls(monkeypatch)
+
+    found = planner._find_existing_path(f"Generate a blockscape map for the domain of\nfile: {target}")
+
+    assert found == str(target)
+    assert listed == []
+    assert stats == [str(target)]
+
+
+def test_directory_listing_matches_names_case_and_normalisation_insensitively(monkeypatch):
+    monkeypatch.setattr(planner.os, "listdir", lambda path: ["Design.MD", "cafe\u0301.md"])
+    monkeypatch.setattr(planner.os.path, "isfile", lambda path: True)
+
+    assert planner._PathProber().scan("docs/design.md")
+    assert planner._PathProber().scan("docs/caf\u00e9.md")
+    assert not planner._PathProber().scan("docs/other.md")
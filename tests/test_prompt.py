@@ -0,0 +1,55 @@
+import os
+
+from skill.core import prompt
+from skill.core.types import SkillPlan
+
+
+def _plan(file_path=None, user_text="short request"):
+    return SkillPlan(
+        user_text=user_text,
+        file_path=file_path,
+        want_series=False,
+        want_wardley=False,
+        deterministic=False,
+    )
+
+
+def test_build_prompt_parts_join_to_build_prompt(tmp_path, monkeypatch):
+    template = tmp_path / "prompt.md"
+    template.write_text("Map [referenced file] now; cite [referenced file].", encoding="utf-8")
+    monkeypatch.setenv("BLOCKSCAPE_PROMPT_PATH", str(template))
+
+    plan = _plan(file_path="docs/a.md")
+    parts = prompt.build_prompt_parts(plan, "SOURCE")
+
+    assert "".join(parts) == prompt.build_prompt(plan, "SOURCE")
+    assert "".join(parts) == (
+        "Map docs/a.md now; cite docs/a.md."
+        "\n\nUser request:\nshort request"
+        "\n\nReferenced file content:\nSOURCE"
+    )
+    assert parts[-1] == "SOURCE"
+
+
+def test_template_is_reread_only_when_it_changes(tmp_path, monkeypatch):
+    template = tmp_path / "prompt.md"
+    template.write_text("first", encoding="utf-8")
+    monkeypatch.setenv("BLOCKSCAPE_PROMPT_PATH", str(template))
+    reads = []
+    original = type(template).read_text
+
+    def counting_read_text(self, *args, **kwargs):
+        reads.append(self)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(template), "read_text", counting_read_text)
+
+    assert prompt.build_prompt(_plan(user_text=""), "").startswith("first")
+    assert prompt.build_prompt(_plan(user_text=""), "").startswith("first")
+    assert len(reads) == 1
+
+    template.write_text("second!", encoding="utf-8")
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert prompt.build_prompt(_plan(user_text=""), "").startswith("second!")
+    assert len(reads) == 2
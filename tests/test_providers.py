@@ -0,0 +1,64 @@
+import subprocess
+import sys
+
+import pytest
+
+from skill import providers
+
+
+HEAVY_MODULES = (
+    "skill.adapters.claude",
+    "skill.adapters.codex",
+    "skill.adapters.codex_cli",
+    "skill.core.cache",
+    "urllib.request",
+    "http.client",
+    "subprocess",
+    "tempfile",
+    "shlex",
+    "asyncio",
+    "importlib.metadata",
+    "concurrent.futures",
+)
+
+
+def test_deterministic_cli_imports_no_adapters():
+    code = (
+        "import sys\n"
+        "from skill.cli import main\n"
+        "main(['--provider', 'codex', '--deterministic'])\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)\n"
+    )
+    p = subprocess.run(
+        [sys.executable, "-c", code],
+        input=open("tests/golden/simple.in").read(),
+        text=True,
+        capture_output=True,
+    )
+    assert p.returncode == 0, p.stderr
+    assert p.stdout == open("tests/golden/simple.out").read()
+    assert p.stderr.strip() == ""
+
+
+class _FakeEntryPoint:
+    name = "echo"
+
+    def load(self):
+        class Echo:
+            @staticmethod
+            def run(text, deterministic=False, on_text=None):
+                return f"echo:{text}"
+
+        return Echo
+
+
+def test_plugins_are_loaded_from_entry_points(monkeypatch):
+    monkeypatch.setattr(providers, "_plugins", {"echo": _FakeEntryPoint()})
+    monkeypatch.setattr(providers, "_loaded", {})
+
+    assert providers.available_providers() == providers.PROVIDERS + ("echo",)
+    assert providers.run_provider("echo", "hi", deterministic=True) == "echo:hi"
+    with pytest.raises(ValueError, match="does not support"):
+        providers.complete_prompt("echo", "prompt")
+    with pytest.raises(ValueError, match="Unknown provider"):
+        providers.get_provider("missing")
@@ -0,0 +1,107 @@
+import json
+import http.client
+import socket
+import threading
+
+import pytest
+
+from skill.server import make_server
+
+REQUEST = "Generate a blockscape map for the domain of tests/fixtures/payments.md"
+
+
+@pytest.fixture
+def server():
+    srv = make_server(port=0, deterministic=True, concurrency=2)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _request(srv, method, path, payload=None):
+    conn = http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=10)
+    body = json.dumps(payload).encode() if payload is not None else None
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = json.loads(resp.read())
+    conn.close()
+    return resp.status, data
+
+
+def test_run_endpoint_matches_cli_output(server):
+    status, data = _request(server, "POST", "/run", {"text": REQUEST, "provider": "codex"})
+    assert status == 200
+    assert data["output"] + "\n" == open("tests/golden/simple.out").read()
+
+    status, data = _request(server, "POST", "/skill", {"text": REQUEST})
+    assert status == 200
+    assert json.loads(data["output"])["id"] == "payment-processing-platform"
+
+
+def test_health_metrics_and_errors(server):
+    assert _request(server, "GET", "/health") == (200, {"status": "ok"})
+
+    status, data = _request(server, "POST", "/run", {"provider": "codex"})
+    assert status == 400
+    assert "text" in data["error"]
+
+    status, metrics = _request(server, "GET", "/metrics")
+    assert status == 200
+    assert metrics["failed"] == 1
+    assert metrics["in_flight"] == 0
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets unavailable")
+def test_unix_socket_server(tmp_path):
+    path = str(tmp_path / "skill.sock")
+    srv = make_server(socket_path=path, deterministic=True)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        sock.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        reply = b""
+        while chunk := sock.recv(4096):
+            reply += chunk
+        sock.close()
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert reply.startswith(b"HTTP/1.1 200")
+    assert reply.endswith(b'{"status": "ok"}')
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_invalid_content_length_is_rejected(server, length):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    conn.putrequest("POST", "/run")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    resp = conn.getresponse()
+    data = json.loads(resp.read())
+    conn.close()
+    assert resp.status == 400
+    assert "Content-Length" in data["error"]
+
+
+def test_socket_path_must_not_be_a_regular_file(tmp_path):
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me")
+
+    with pytest.raises(FileExistsError):
+        make_server(socket_path=str(path), deterministic=True)
+    assert path.read_text() == "keep me"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets unavailable")
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "skill.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    srv = make_server(socket_path=path, deterministic=True)
+    srv.server_close()
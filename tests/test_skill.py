@@ -8,3 +8,46 @@ def test_simple():
         stdout=PIPE
     )
     assert p.stdout == open("tests/golden/simple.out").read()
+
+
+def test_simple_stream_matches_buffered_output():
+    p = run(
+        ["python", "-m", "skill.cli", "--provider", "codex", "--deterministic", "--stream"],
+        input=open("tests/golden/simple.in").read(),
+        text=True,
+        stdout=PIPE
+    )
+    assert p.stdout == open("tests/golden/simple.out").read()
+
+
+def test_trace_records_pipeline_stages(tmp_path):
+    import json
+
+    trace_path = tmp_path / "trace.jsonl"
+    p = run(
+        ["python", "-m", "skill.cli", "--provider", "codex", "--deterministic", "--trace", str(trace_path)],
+        input=open("tests/golden/simple.in").read(),
+        text=True,
+        stdout=PIPE
+    )
+    assert p.stdout == open("tests/golden/simple.out").read()
+
+    spans = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    names = [span["name"] for span in spans]
+    for stage in ("stdin.read", "plan", "load_source", "execute", "write", "cli"):
+        assert stage in names
+    assert len({span["trace"] for span in spans}) == 1
+    root = spans[names.index("cli")]
+    assert root["parent"] is None
+    assert all(span["parent"] == root["span"] for span in spans if span is not root)
+    assert all(span["duration_ms"] >= 0 for span in spans)
+
+
+def test_trace_is_a_no_op_when_disabled():
+    from skill.core import trace
+
+    trace.configure(None)
+    with trace.span("anything", size=1) as span:
+        span.set(more=2)
+        assert not span
+    assert not trace.enabled()
@@ -0,0 +1,63 @@
+from skill.core.source import load_source, read_source_file
+from skill.core.types import SkillPlan
+
+
+def _plan(file_path=None, user_text="short request"):
+    return SkillPlan(
+        user_text=user_text,
+        file_path=file_path,
+        want_series=False,
+        want_wardley=False,
+        deterministic=False,
+    )
+
+
+def _doc():
+    sections = []
+    for idx in range(4):
+        body = "\n".join(f"body line {idx}-{line} " + "x" * 40 for line in range(50))
+        sections.append(f"## Section {idx}\n{body}\n")
+    return "# Title\nintro\n" + "".join(sections)
+
+
+def test_load_source_truncates_file_to_budget_keeping_headings(tmp_path, monkeypatch):
+    doc = tmp_path / "big.md"
+    doc.write_text(_doc(), encoding="utf-8")
+    monkeypatch.setenv("BLOCKSCAPE_MAX_SOURCE_TOKENS", "200")
+
+    text, title = load_source(_plan(file_path=str(doc)))
+
+    assert title == "Title"
+    assert len(text.encode("utf-8")) <= 800 + 10 * len("[...]\n")
+    assert [line for line in text.splitlines() if line.startswith("#")] == [
+        "# Title",
+        "## Section 0",
+        "## Section 1",
+        "## Section 2",
+        "## Section 3",
+    ]
+    assert "body line 3-0 " in text
+    assert "[...]" in text
+
+
+def test_load_source_budget_applies_to_inline_text_and_matches_file(tmp_path):
+    doc = tmp_path / "big.md"
+    doc.write_text(_doc(), encoding="utf-8")
+
+    from_file, _ = load_source(_plan(file_path=str(doc)), max_bytes=1000)
+    inline, _ = load_source(_plan(user_text=_doc()), max_bytes=1000)
+
+    assert from_file == inline
+    assert load_source(_plan(file_path=str(doc)))[0] == _doc()
+
+
+def test_read_source_file_normalizes_newlines_and_keeps_crlf_headings(tmp_path):
+    doc = tmp_path / "crlf.md"
+    doc.write_bytes(_doc().replace("\n", "\r\n").encode("utf-8"))
+
+    assert read_source_file(str(doc)) == _doc()
+    truncated = read_source_file(str(doc), budget=1000)
+    assert "\r" not in truncated
+    assert [line for line in truncated.splitlines() if line.startswith("#")] == [
+        line for line in _doc().splitlines() if line.startswith("#")
+    ]
@@ -1,8 +1,14 @@
+import hashlib
 import importlib.util
 import os
+import subprocess
+import sys
+import threading
 import time
 from pathlib import Path
 
+import pytest
+
 
 WATCH_MD_PATH = Path(__file__).resolve().parents[1] / "scripts" / "watch_md.py"
 WATCH_MD_SPEC = importlib.util.spec_from_file_location("watch_md", WATCH_MD_PATH)
@@ -13,6 +19,16 @@ scan_files = WATCH_MD_MODULE.scan_files
 build_output_path = WATCH_MD_MODULE.build_output_path
 format_output = WATCH_MD_MODULE.format_output
 DEFAULT_MD_TEMPLATE = WATCH_MD_MODULE.DEFAULT_MD_TEMPLATE
+GenerationPool = WATCH_MD_MODULE.GenerationPool
+PRIORITY_EDIT = WATCH_MD_MODULE.PRIORITY_EDIT
+PRIORITY_BACKFILL = WATCH_MD_MODULE.PRIORITY_BACKFILL
+parse_provider_limits = WATCH_MD_MODULE.parse_provider_limits
+source_candidates = WATCH_MD_MODULE.source_candidates
+InotifyWatcher = WATCH_MD_MODULE.InotifyWatcher
+process_path = WATCH_MD_MODULE.process_path
+WatchState = WATCH_MD_MODULE.WatchState
+file_signature = WATCH_MD_MODULE.file_signature
+content_hash = WATCH_MD_MODULE.content_hash
 
 
 def test_scan_files_skips_when_bs_output_exists(tmp_path):
@@ -110,3 +126,446 @@ def test_scan_files_skips_older_than_max_age(tmp_path):
 
     assert str(recent) in seen
     assert str(old) not in seen
+
+
+def test_generation_pool_never_runs_same_path_concurrently():
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+    active = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    def handler(path, provider):
+        with lock:
+            if path in active:
+                overlaps.append(path)
+            active.add(path)
+            calls.append(path)
+        started.set()
+        release.wait(5)
+        with lock:
+            active.discard(path)
+
+    pool = GenerationPool(handler, workers=4)
+    pool.submit("/docs/a.md", "codex")
+    assert started.wait(5)
+    pool.submit("/docs/a.md", "codex")
+    pool.submit("/docs/a.md", "codex")
+    release.set()
+    pool.join()
+
+    assert calls == ["/docs/a.md", "/docs/a.md"]
+    assert overlaps == []
+
+
+def test_generation_pool_respects_provider_limit():
+    peak = []
+    running = [0]
+    lock = threading.Lock()
+
+    def handler(path, provider):
+        with lock:
+            running[0] += 1
+            peak.append(running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    pool = GenerationPool(handler, workers=6, provider_limits={"codex-cli": 2})
+    for idx in range(8):
+        pool.submit(f"/docs/{idx}.md", "codex-cli")
+    pool.join()
+
+    assert len(peak) == 8
+    assert max(peak) <= 2
+
+
+def test_generation_pool_keeps_capped_jobs_queued_in_priority_order():
+    release = threading.Event()
+    started = threading.Event()
+    order = []
+
+    def handler(path, provider):
+        order.append(path)
+        started.set()
+        release.wait(5)
+
+    pool = GenerationPool(handler, workers=4, provider_limits={"codex-cli": 1})
+    pool.submit("/docs/blocker.md", "codex-cli")
+    assert started.wait(5)
+    pool.submit("/docs/old-a.md", "codex-cli", PRIORITY_BACKFILL, size=10)
+    pool.submit("/docs/old-b.md", "codex-cli", PRIORITY_BACKFILL, size=20)
+    pool.submit("/docs/edit.md", "codex-cli", PRIORITY_EDIT, size=5000)
+    time.sleep(0.1)
+    assert pool.depth() == {"edits": 1, "backfill": 2, "running": 1}
+    release.set()
+    pool.join()
+
+    assert order == ["/docs/blocker.md", "/docs/edit.md", "/docs/old-a.md", "/docs/old-b.md"]
+
+
+def test_generation_pool_runs_edits_before_backfill_and_small_files_first():
+    release = threading.Event()
+    started = threading.Event()
+    order = []
+
+    def handler(path, provider):
+        order.append(path)
+        started.set()
+        release.wait(5)
+
+    pool = GenerationPool(handler, workers=1, max_backlog=3)
+    pool.submit("/docs/blocker.md", "codex")
+    assert started.wait(5)
+    assert pool.submit("/docs/big.md", "codex", PRIORITY_BACKFILL, size=900)
+    assert pool.submit("/docs/small.md", "codex", PRIORITY_BACKFILL, size=10)
+    assert pool.submit("/docs/upgraded.md", "codex", PRIORITY_BACKFILL, size=5)
+    assert not pool.submit("/docs/refused.md", "codex", PRIORITY_BACKFILL, size=1)
+    assert not pool.submit("/docs/upgraded.md", "codex", PRIORITY_EDIT, size=5)
+    assert pool.submit("/docs/edit.md", "codex", PRIORITY_EDIT, size=5000)
+    assert pool.depth() == {"edits": 2, "backfill": 2, "running": 1}
+    release.set()
+    pool.join()
+
+    assert order == [
+        "/docs/blocker.md",
+        "/docs/upgraded.md",
+        "/docs/edit.md",
+        "/docs/small.md",
+        "/docs/big.md",
+    ]
+
+
+def test_parse_provider_limits_rejects_unknown_provider():
+    assert parse_provider_limits(["claude=3"]) == {"claude": 3}
+    with pytest.raises(ValueError, match="nope=3"):
+        parse_provider_limits(["nope=3"])
+
+
+def test_parse_provider_limits_accepts_plugin_providers(monkeypatch):
+    monkeypatch.setattr(WATCH_MD_MODULE, "available_providers", lambda: ("codex", "echo"))
+
+    assert parse_provider_limits(["echo=5"]) == {"echo": 5}
+
+
+def test_generation_pool_ignores_provider_limits_when_not_limiting():
+    lock = threading.Lock()
+    running = []
+    peak = []
+    ready = threading.Barrier(4, timeout=5)
+
+    def handler(path, provider):
+        with lock:
+            running.append(path)
+            peak.append(len(running))
+        ready.wait()
+        with lock:
+            running.remove(path)
+
+    pool = GenerationPool(handler, workers=4, limit_providers=False)
+    for idx in range(4):
+        pool.submit(f"/docs/{idx}.md", "codex-cli")
+    pool.join()
+
+    assert max(peak) == 4
+
+
+def test_source_candidates_maps_outputs_back_to_sources():
+    assert source_candidates("/docs/topic.md") == ["/docs/topic.md"]
+    assert source_candidates("/docs/topic.bs") == ["/docs/topic.md", "/docs/topic.markdown"]
+    assert source_candidates("/docs/topic-bs.md") == ["/docs/topic.md", "/docs/topic.markdown"]
+    assert source_candidates("/docs/topic.bs.tmp") == []
+    assert source_candidates("/docs/.hidden.md") == []
+
+
+def test_inotify_watcher_debounces_repeated_writes(tmp_path):
+    try:
+        watcher = InotifyWatcher(str(tmp_path), debounce=0.2)
+    except OSError as exc:
+        pytest.skip(f"inotify unavailable: {exc}")
+    try:
+        nested = tmp_path / "nested"
+        nested.mkdir()
+        doc = nested / "doc.md"
+        for idx in range(3):
+            doc.write_text(f"draft {idx}", encoding="utf-8")
+        (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+        assert watcher.poll(0.05) == []
+        settled = []
+        deadline = time.monotonic() + 5
+        while not settled and time.monotonic() < deadline:
+            settled = watcher.poll(0.1)
+
+        assert settled == [str(doc)]
+    finally:
+        watcher.close()
+
+
+def test_incremental_mode_only_sends_changed_sections(tmp_path, monkeypatch):
+    source = tmp_path / "topic.md"
+    source.write_text("# Topic\nIntro\n## Alpha\nold alpha\n## Beta\nbeta\n## Gamma\ngamma\n")
+    base_map = '{"id": "topic", "categories": [{"id": "alpha", "items": []}, {"id": "beta", "items": []}]}'
+    full_runs = []
+    prompts = []
+
+    def fake_generate(path, provider, deterministic):
+        full_runs.append(path)
+        return base_map
+
+    def fake_complete(provider, prompt):
+        prompts.append(prompt)
+        return '```json\n{"categories": [{"id": "alpha", "items": [{"id": "new"}]}], "removed": ["beta"]}\n```'
+
+    monkeypatch.setattr(WATCH_MD_MODULE, "generate_output", fake_generate)
+    monkeypatch.setattr(WATCH_MD_MODULE, "complete_prompt", fake_complete)
+
+    out_path = process_path(str(source), "codex", False, incremental=True)
+    assert full_runs == [str(source)]
+    assert (tmp_path / ".topic.bs.sections.json").exists()
+
+    assert process_path(str(source), "codex", False, incremental=True) == out_path
+    assert full_runs == [str(source)] and prompts == []
+
+    source.write_text("# Topic\nIntro\n## Alpha\nnew alpha\n## Beta\nbeta\n## Gamma\ngamma\n")
+    process_path(str(source), "codex", False, incremental=True)
+
+    assert len(full_runs) == 1
+    assert len(prompts) == 1
+    assert "Changed section: Topic > Alpha\n## Alpha\nnew alpha" in prompts[0]
+    assert "Gamma" not in prompts[0]
+    written = Path(out_path).read_text()
+    assert '"id": "new"' in written
+    assert '"beta"' not in written
+
+
+def test_scan_files_includes_existing_outputs_when_incremental(tmp_path):
+    md_path = tmp_path / "doc.md"
+    md_path.write_text("x" * 10)
+    (tmp_path / "doc.bs").write_text("{}")
+
+    assert scan_files(str(tmp_path), min_bytes=0) == {}
+    assert list(scan_files(str(tmp_path), min_bytes=0, include_existing=True)) == [str(md_path)]
+
+
+def test_watch_state_persists_and_confirms_by_content(tmp_path):
+    source = tmp_path / "doc.md"
+    source.write_text("# Doc\nbody\n")
+    state_file = tmp_path / "state.json"
+
+    state = WatchState(str(state_file))
+    state.record(str(source), file_signature(str(source)), content_hash(str(source)), "out")
+    state.flush()
+    assert not state_file.exists()
+    state.flush(force=True)
+
+    reloaded = WatchState(str(state_file))
+    assert reloaded.get(str(source))["output_hash"] == "out"
+    assert reloaded.is_current(str(source), file_signature(str(source)))
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert reloaded.is_current(str(source), file_signature(str(source)))
+    reloaded.flush(force=True)
+    assert WatchState(str(state_file)).get(str(source))["mtime_ns"] == stat.st_mtime_ns + 5_000_000_000
+
+    source.write_text("# Doc\nchanged\n")
+    assert not reloaded.is_current(str(source), file_signature(str(source)))
+
+
+def test_watch_state_loads_without_stat_and_forgets_deleted_sources(tmp_path, monkeypatch):
+    state_file = tmp_path / "state.json"
+    state = WatchState(str(state_file))
+    state.record(str(tmp_path / "gone.md"), (1, 2), "abc", None)
+    state.flush(force=True)
+
+    monkeypatch.setattr(WATCH_MD_MODULE.os.path, "exists", lambda path: pytest.fail("stat on load"))
+    reloaded = WatchState(str(state_file))
+    monkeypatch.undo()
+    assert len(reloaded) == 1
+
+    reloaded.forget(str(tmp_path / "gone.md"))
+    reloaded.flush(force=True)
+    assert len(WatchState(str(state_file))) == 0
+
+
+def test_content_hash_matches_for_small_and_multi_chunk_files(tmp_path):
+    small = tmp_path / "small.md"
+    large = tmp_path / "large.md"
+    small.write_bytes(b"a" * 10)
+    large.write_bytes(b"b" * (WATCH_MD_MODULE._HASH_CHUNK_BYTES * 2 + 10))
+
+    for path in (small, large):
+        expected = hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+        assert content_hash(str(path)) == expected
+
+
+def test_watch_state_requires_the_recorded_output(tmp_path):
+    source = tmp_path / "doc.md"
+    source.write_text("# Doc\n")
+    output = tmp_path / "doc.bs"
+    output.write_text("{}")
+    state = WatchState(None)
+    sig = file_signature(str(source))
+    state.record(str(source), sig, content_hash(str(source)), content_hash(str(output)))
+
+    assert state.is_current(str(source), sig, str(output))
+    output.write_text('{"edited": true}')
+    assert not state.is_current(str(source), sig, str(output))
+    output.unlink()
+    assert not state.is_current(str(source), sig, str(output))
+
+
+def test_watch_state_checks_the_output_by_stat_before_hashing(tmp_path, monkeypatch):
+    source = tmp_path / "doc.md"
+    source.write_text("# Doc\n")
+    output = tmp_path / "doc.bs"
+    output.write_text("{}")
+    state = WatchState(None)
+    sig = file_signature(str(source))
+    state.record(
+        str(source), sig, content_hash(str(source)), content_hash(str(output)), file_signature(str(output))
+    )
+    hashed = []
+    real_hash = WATCH_MD_MODULE.content_hash
+    monkeypatch.setattr(WATCH_MD_MODULE, "content_hash", lambda path: hashed.append(path) or real_hash(path))
+
+    assert state.is_current(str(source), sig, str(output))
+    assert hashed == []
+
+    stat = output.stat()
+    os.utime(output, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert state.is_current(str(source), sig, str(output))
+    assert state.is_current(str(source), sig, str(output))
+    assert hashed == [str(output)]
+
+
+def _wait_for(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _start_watcher(root, *extra):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            str(WATCH_MD_PATH),
+            "--root",
+            str(root),
+            "--provider",
+            "codex",
+            "--deterministic",
+            "--backend",
+            "poll",
+            "--interval",
+            "0.1",
+            "--min-bytes",
+            "0",
+            *extra,
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+
+
+def _stop_watcher(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def test_watcher_regenerates_deleted_output(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    (root / "doc.md").write_text("# Doc\n\n## Area\nbody\n")
+    output = root / "doc.bs"
+    proc = _start_watcher(root, "--initial")
+    try:
+        proc.stdin.write("y\n")
+        proc.stdin.close()
+        assert _wait_for(output.exists)
+        # Let a scan observe the output before removing it.
+        time.sleep(0.5)
+        output.unlink()
+        assert _wait_for(output.exists)
+    finally:
+        _stop_watcher(proc)
+
+
+def test_watcher_regenerates_output_deleted_while_stopped(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    (root / "doc.md").write_text("# Doc\n\n## Area\nbody\n")
+    output = root / "doc.bs"
+    state_file = root / WATCH_MD_MODULE.DEFAULT_STATE_FILE
+    proc = _start_watcher(root, "--initial")
+    try:
+        proc.stdin.write("y\n")
+        proc.stdin.close()
+        assert _wait_for(output.exists)
+    finally:
+        _stop_watcher(proc)
+    assert "doc.md" in state_file.read_text()
+
+    output.unlink()
+    proc = _start_watcher(root)
+    try:
+        assert _wait_for(output.exists)
+    finally:
+        _stop_watcher(proc)
+
+
+def test_watch_metrics_render_prometheus_text():
+    metrics = WATCH_MD_MODULE.WatchMetrics(buckets=(1.0, 10.0))
+    metrics.observe_scan(0.25, 12)
+    metrics.observe_skip()
+    metrics.observe_generation("codex", "success", 0.5, written=300)
+    metrics.observe_generation("codex", "success", 4.0, written=200)
+    metrics.observe_generation('co"dex', "failure", 50.0)
+
+    text = metrics.render(lambda: {"edits": 2, "backfill": 5, "running": 1, "waiting": 7})
+    lines = text.splitlines()
+
+    assert "# TYPE watch_md_generation_duration_seconds histogram" in lines
+    assert "watch_md_scan_duration_seconds_count 1" in lines
+    assert "watch_md_files_scanned 12" in lines
+    assert 'watch_md_queue_depth{kind="waiting"} 7' in lines
+    assert "watch_md_generations_in_flight 1" in lines
+    assert "watch_md_generations_skipped_total 1" in lines
+    assert 'watch_md_generations_total{provider="codex",outcome="success"} 2' in lines
+    assert 'watch_md_generations_total{provider="co\\"dex",outcome="failure"} 1' in lines
+    assert 'watch_md_output_bytes_total{provider="codex"} 500' in lines
+    assert 'watch_md_generation_duration_seconds_bucket{provider="codex",le="1.0"} 1' in lines
+    assert 'watch_md_generation_duration_seconds_bucket{provider="codex",le="10.0"} 2' in lines
+    assert 'watch_md_generation_duration_seconds_bucket{provider="co\\"dex",le="10.0"} 0' in lines
+    assert 'watch_md_generation_duration_seconds_bucket{provider="co\\"dex",le="+Inf"} 1' in lines
+    assert 'watch_md_generation_duration_seconds_sum{provider="codex"} 4.5' in lines
+
+
+def test_metrics_are_served_over_http_and_written_to_file(tmp_path):
+    import urllib.request
+
+    server = WATCH_MD_MODULE.serve_metrics("127.0.0.1", 0, lambda: "watch_md_up 1\n")
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read() == b"watch_md_up 1\n"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    path = tmp_path / "watch_md.prom"
+    WATCH_MD_MODULE.write_metrics_file(str(path), lambda: "watch_md_up 1\n")
+    assert path.read_text() == "watch_md_up 1\n"
+    assert not (tmp_path / "watch_md.prom.tmp").exists()